@@ -0,0 +1,22 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from users.tokens import get_token_user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token auth without a Token-User query on cache hits."""
+
+    def authenticate_credentials(self, key):
+        try:
+            user, token = get_token_user(key)
+        except self.get_model().DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        return (user, token)
@@ -1,17 +1,109 @@
-import base64
+from collections.abc import Mapping
 
-from django.core.files.base import ContentFile
-from rest_framework import fields
+from django.core.exceptions import ValidationError as DjangoValidationError
+from drf_extra_fields import fields
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
+from core.metrics import IMAGE_DURATION
 
-class Base64ImageField(fields.ImageField):
+
+class Base64ImageField(fields.Base64ImageField):
     """Decode images field."""
 
     def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith('data:image'):
-            img_format, img_str = data.split(';base64,')
-            ext = img_format.split('/')[-1]
+        with IMAGE_DURATION.time():
+            return super().to_internal_value(data)
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field resolving many ids with one `IN` query.
+
+    With `many=True` the whole list is resolved at once, inside a
+    `BulkListSerializer` the ids of all items are. Error messages are the
+    ones of `PrimaryKeyRelatedField`.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.resolved = None
 
-            data = ContentFile(base64.b64decode(img_str), name=f'image.{ext}')
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def to_pk(self, data):
+        """Primary key value or None for malformed input."""
+        if isinstance(data, bool):
+            return None
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            return None
+
+    def resolve(self, values):
+        """Load the objects of all valid ids for `to_internal_value`."""
+        pks = {pk for pk in map(self.to_pk, values) if pk is not None}
+        self.resolved = self.get_queryset().in_bulk(pks)
+
+    def to_internal_value(self, data):
+        if self.resolved is None:
+            return super().to_internal_value(data)
+        pk = self.to_pk(data)
+        if pk is None:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.resolved[pk]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
 
-        return super().to_internal_value(data)
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """List of related objects, every invalid id reported."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        objects = []
+        errors = []
+        self.child_relation.resolve(data)
+        try:
+            for item in data:
+                try:
+                    objects.append(self.child_relation.to_internal_value(item))
+                except serializers.ValidationError as error:
+                    errors.extend(error.detail)
+        finally:
+            self.child_relation.resolved = None
+        if errors:
+            raise serializers.ValidationError(errors)
+        return objects
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Resolves bulk related fields of all items before validating them."""
+
+    def to_internal_value(self, data):
+        bulk_fields = [
+            field for field in self.child.fields.values()
+            if isinstance(field, BulkPrimaryKeyRelatedField)
+        ]
+        if isinstance(data, list):
+            for field in bulk_fields:
+                field.resolve(
+                    item[field.field_name] for item in data
+                    if isinstance(item, Mapping) and field.field_name in item
+                )
+        try:
+            return super().to_internal_value(data)
+        finally:
+            for field in bulk_fields:
+                field.resolved = None
@@ -12,14 +12,19 @@ User = get_user_model()
 class IngredientFilterSet(FilterSet):
     """Ingredients filter"""
 
-    name = CharFilter(
-        lookup_expr='istartswith'
-    )
+    name = CharFilter(method='name_filter')
 
     class Meta:
         model = Ingredient
         fields = ('name',)
 
+    def name_filter(self, queryset, name, value):
+        """
+        Names are stored lowercase, so a case-sensitive prefix match
+        gives the same rows and can use the `varchar_pattern_ops` index.
+        """
+        return queryset.filter(name__startswith=value.lower())
+
 
 class RecipeFilterSet(FilterSet):
     """Recipes filter"""
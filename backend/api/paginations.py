@@ -1,4 +1,10 @@
-from rest_framework.pagination import PageNumberPagination
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor, CursorPagination, PageNumberPagination,
+)
+from rest_framework.response import Response
 
 from core.constants import PAGE_SIZE
 
@@ -8,3 +14,55 @@ class FoodgramPagination(PageNumberPagination):
 
     page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+
+
+class FeedPagination(CursorPagination):
+    """
+    Forward-only cursor over (created_at, id) positions.
+
+    The page is fetched by a callable instead of a queryset, so the feed
+    can merge several index scans.
+    """
+
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+
+    def paginate_feed(self, get_page, request):
+        """
+        :param get_page: (position, limit) -> [(created_at, id), ...]
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        cursor = self.decode_cursor(request)
+        position = None if cursor is None else self._parse(cursor.position)
+
+        rows = get_page(position, self.page_size + 1)
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.has_next:
+            created_at, pk = rows[-1]
+            self.next_position = f'{created_at.isoformat()}|{pk}'
+        return rows
+
+    def _parse(self, position):
+        try:
+            created_at, pk = position.split('|')
+            return datetime.fromisoformat(created_at), int(pk)
+        except (AttributeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': None,
+            'results': data,
+        })
@@ -1,18 +1,24 @@
+from operator import attrgetter
+
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from django.db import transaction
-from drf_extra_fields.fields import Base64ImageField
 
+from api.fileds import (
+    Base64ImageField, BulkListSerializer, BulkPrimaryKeyRelatedField,
+)
 from api.constants import (
     MAX_INTEGER, MAX_VALUE_MSG, MIN_INTEGER, MIN_VALUE_MSG
 )
 from api.users.serializers import UserSerializer
 from api.shortener.serializers import ShortRecipeSerializer
+from core.timing import SerializeTimingMixin
 from recipes.models import (
     FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag,
 )
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SerializeTimingMixin, serializers.ModelSerializer):
     """Tags serializer."""
 
     class Meta:
@@ -24,7 +30,7 @@ class TagSerializer(serializers.ModelSerializer):
         )
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(SerializeTimingMixin, serializers.ModelSerializer):
     """Ingredient serializer."""
 
     class Meta:
@@ -62,7 +68,7 @@ class IngredientGetSerializer(serializers.ModelSerializer):
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     """Short ingredient serializer."""
 
-    id = serializers.PrimaryKeyRelatedField(
+    id = BulkPrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(),
         source='ingredient'
     )
@@ -81,9 +87,10 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
             'id',
             'amount'
         )
+        list_serializer_class = BulkListSerializer
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SerializeTimingMixin, serializers.ModelSerializer):
     """Recipe serializer."""
 
     author = UserSerializer(read_only=True)
@@ -116,7 +123,7 @@ class RecipeSerializer(serializers.ModelSerializer):
 class RecipeCreateSerializer(serializers.ModelSerializer):
     """Recipes create serializer."""
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True
     )
@@ -182,26 +189,35 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             recipe = Recipe.objects.create(
                 author=self.context['request'].user, **validated_data
             )
-            self.add_tags_and_ingredients_to_recipe(recipe, tags, ingredients)
-            return recipe
+            recipe_ingredients = self.add_tags_and_ingredients_to_recipe(
+                recipe, tags, ingredients
+            )
+        # Новый рецепт еще никто не добавил в избранное и корзину.
+        recipe.is_favorited = recipe.is_in_shopping_cart = False
+        self.written = (tags, recipe_ingredients)
+        return recipe
 
     def update(self, instance, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('recipe_ingredients')
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('recipe_ingredients', None)
+        recipe_ingredients = None
         with transaction.atomic():
-            instance.ingredients.clear()
-            instance.tags.clear()
-            self.add_tags_and_ingredients_to_recipe(
-                instance, tags, ingredients
-            )
-            super().update(instance, validated_data)
-            return instance
+            if tags is not None:
+                # set() сам вычисляет разницу с текущими тегами.
+                instance.tags.set(tags)
+            if ingredients is not None:
+                recipe_ingredients = self.update_ingredients(
+                    instance, ingredients
+                )
+            instance = super().update(instance, validated_data)
+        self.written = (tags, recipe_ingredients)
+        return instance
 
     @staticmethod
     def add_tags_and_ingredients_to_recipe(recipe, tags, ingredients):
-        """Add or update ingredients."""
-        recipe.tags.set(tags)
-        RecipeIngredient.objects.bulk_create(
+        """Add tags and ingredients to a new recipe."""
+        recipe.tags.add(*tags)
+        return RecipeIngredient.objects.bulk_create(
             RecipeIngredient(
                 recipe=recipe,
                 ingredient=ingredient['ingredient'],
@@ -210,7 +226,83 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             for ingredient in ingredients
         )
 
+    @staticmethod
+    def update_ingredients(recipe, ingredients):
+        """
+        Delete, update and insert only the changed ingredient rows.
+
+        :return: recipe ingredients in the submitted order.
+        """
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in RecipeIngredient.objects.filter(
+                recipe=recipe
+            )
+        }
+        submitted = {item['ingredient'].id: item for item in ingredients}
+
+        removed = current.keys() - submitted.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+
+        result = []
+        changed = []
+        added = []
+        for ingredient_id, ingredient in submitted.items():
+            recipe_ingredient = current.get(ingredient_id)
+            if recipe_ingredient is None:
+                recipe_ingredient = RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=ingredient['ingredient'],
+                    amount=ingredient['amount'],
+                )
+                added.append(recipe_ingredient)
+            else:
+                recipe_ingredient.ingredient = ingredient['ingredient']
+                if recipe_ingredient.amount != ingredient['amount']:
+                    recipe_ingredient.amount = ingredient['amount']
+                    changed.append(recipe_ingredient)
+            result.append(recipe_ingredient)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
+        return result
+
+    @staticmethod
+    def cache_related(recipe, tags, recipe_ingredients):
+        """
+        Prefetch caches from the written rows.
+
+        The response is rendered from the validated objects instead of
+        reading the rows back, in the order of the read path; None leaves
+        the relation to be queried.
+        """
+        recipe._prefetched_objects_cache = {}
+        related = (
+            ('tags', tags and sorted(tags, key=attrgetter('name'))),
+            (
+                'recipe_ingredients',
+                recipe_ingredients
+                and sorted(recipe_ingredients, key=attrgetter('id')),
+            ),
+        )
+        for name, objects in related:
+            if objects is None:
+                continue
+            queryset = getattr(recipe, name).all()
+            queryset._result_cache = list(objects)
+            queryset._prefetch_done = True
+            recipe._prefetched_objects_cache[name] = queryset
+
     def to_representation(self, instance):
+        # UpdateModelMixin сбрасывает кэш prefetch после сохранения,
+        # поэтому он заполняется прямо перед выводом.
+        written = getattr(self, 'written', None)
+        if written is not None:
+            self.cache_related(instance, *written)
         return RecipeSerializer(instance, context=self.context).data
 
 
@@ -219,6 +311,8 @@ class AuthorRecipeSerializer(serializers.ModelSerializer):
 
     _recipe_added_to: str = None
 
+    recipe = BulkPrimaryKeyRelatedField(queryset=Recipe.objects.all())
+
     class Meta:
         # переопреляется в наследниках
         # FavoriteSerializer(AuthorRecipeSerializer)
@@ -230,22 +324,41 @@ class AuthorRecipeSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('author',)
 
-    def validate(self, attrs):
-        recipe = attrs['recipe']
-        user = self.context['request'].user
+    def to_internal_value(self, data):
+        # Существование рецепта и дубль проверяет сам INSERT в create().
+        recipe_field = self.fields['recipe']
+        recipe_id = recipe_field.to_pk(data.get('recipe'))
+        if recipe_id is None:
+            raise serializers.ValidationError({'recipe': [
+                recipe_field.error_messages['incorrect_type'].format(
+                    data_type=type(data.get('recipe')).__name__
+                )
+            ]})
+        return {'recipe_id': recipe_id}
 
-        # Метод использует переопределенную модель.
-        if self.Meta.model.objects.filter(author=user, recipe=recipe).exists():
-            raise serializers.ValidationError(
-                f'Рецепт уже добавлен в {self._recipe_added_to}'
-            )
-        return attrs
-
-    def to_representation(self, instance):
-        return ShortRecipeSerializer(
-            instance.recipe,
-            context=self.context
-        ).data
+    def create(self, validated_data):
+        """Add in one query, return the recipe for the short representation."""
+        recipe, created = self.Meta.model.add(
+            validated_data['author'].id,
+            validated_data['recipe_id'],
+            ShortRecipeSerializer.Meta.fields,
+        )
+        if recipe is None:
+            raise serializers.ValidationError({'recipe': [
+                self.fields['recipe'].error_messages['does_not_exist'].format(
+                    pk_value=validated_data['recipe_id']
+                )
+            ]})
+        if not created:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'Рецепт уже добавлен в {self._recipe_added_to}'
+                ]
+            })
+        return recipe
+
+    def to_representation(self, recipe):
+        return ShortRecipeSerializer(recipe, context=self.context).data
 
 
 class FavoriteSerializer(AuthorRecipeSerializer):
@@ -1,19 +1,20 @@
 from io import BytesIO
 
-from django.db.models import Exists, OuterRef
-from django.http import FileResponse
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.reverse import reverse
 
+from core.deletion import schedule_deletion
 from recipes import models
+from recipes.feed import get_feed_page
 from recipes.purchase_product import generate_pdf_file
-from users.models import Subscriber
+from shortener.models import LinkMapped
 from ..filters import IngredientFilterSet, RecipeFilterSet
-from ..paginations import FoodgramPagination
+from ..paginations import FeedPagination, FoodgramPagination
 from ..permissions import IsOwnerOrReadOnly
 from ..shortener.serializers import ShortenerSerializer
 from . import serializers
@@ -25,6 +26,7 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = models.Tag.objects.all()
     serializer_class = serializers.TagSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = 3
 
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
@@ -35,6 +37,7 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.AllowAny]
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilterSet
+    query_budget = 3
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -45,11 +48,27 @@ class RecipeViewSet(viewsets.ModelViewSet):
     permission_classes = [IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilterSet
+    # Не зависят от размера страницы и числа ингредиентов.
+    query_budget = {
+        'list': 9,
+        'retrieve': 8,
+        'feed': 10,
+        'create': 19,
+        'partial_update': 17,
+        'destroy': 11,
+        'get_link': 4,
+        'favorite': 7,
+        'delete_favorite': 6,
+        'shopping_cart': 7,
+        'delete_shopping_cart': 6,
+        'download_shopping_cart': 5,
+    }
 
     def get_serializer_class(self):
         serializer_map = {
             'list': serializers.RecipeSerializer,
             'retrieve': serializers.RecipeSerializer,
+            'feed': serializers.RecipeSerializer,
             'get_link': ShortenerSerializer,
             'favorite': serializers.FavoriteSerializer,
             'shopping_cart': serializers.ShoppingCartSerializer
@@ -60,27 +79,33 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        qs = models.Recipe.objects
-        if self.action in ['list', 'retrieve']:
+        qs = models.Recipe.objects.visible()
+        if self.action in ['list', 'retrieve', 'feed', 'partial_update']:
+            # Ответ на PATCH собирается без повторного чтения рецепта.
             qs = (
                 qs.select_related('author')
-                .prefetch_related(
-                    'recipe_ingredients__ingredient',
-                    'recipe_ingredients',
-                    'tags',
-                    Subscriber.get_prefetch_subscribers(
-                        'author__subscribers', user
-                    ),
-                )
                 .annotate(
                     is_favorited=Exists(
-                        user.favorites.filter(recipe=OuterRef('pk'))
+                        models.FavoriteRecipe.objects.filter(
+                            author_id=user.id, recipe=OuterRef('pk')
+                        )
                     ),
                     is_in_shopping_cart=Exists(
-                        user.shopping_cart.filter(recipe=OuterRef('pk'))
+                        models.ShoppingCart.objects.filter(
+                            author_id=user.id, recipe=OuterRef('pk')
+                        )
                     ),
                 )
-                .all()
+            )
+        if self.action in ['list', 'retrieve', 'feed']:
+            qs = qs.prefetch_related(
+                # Ответ на запись выводит ингредиенты в том же порядке.
+                Prefetch(
+                    'recipe_ingredients',
+                    queryset=models.RecipeIngredient.objects.order_by('id'),
+                ),
+                'recipe_ingredients__ingredient',
+                'tags',
             )
 
         return qs.order_by('-created_at').all()
@@ -92,7 +117,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def download_shopping_cart(self, request):
         """Shopping cart list."""
-        recipes = request.user.shopping_cart.values_list(
+        recipes = request.user.shopping_cart.filter(
+            recipe__is_hidden=False,
+            recipe__author__is_hidden=False,
+        ).values_list(
             'recipe__name',
             flat=True
         ).order_by('recipe__name')
@@ -108,6 +136,29 @@ class RecipeViewSet(viewsets.ModelViewSet):
             filename='foodgram_shopping_list.pdf',
         )
 
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def feed(self, request):
+        """Followed authors recipes."""
+        paginator = FeedPagination()
+        rows = paginator.paginate_feed(
+            lambda position, limit: get_feed_page(
+                request.user, position, limit
+            ),
+            request,
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for _, recipe_id in rows]
+        )
+        serializer = self.get_serializer(
+            [recipes[pk] for _, pk in rows if pk in recipes],
+            many=True,
+        )
+        return paginator.get_paginated_response(serializer.data)
+
     @action(
         methods=['post'],
         detail=True,
@@ -143,20 +194,21 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def get_link(self, request, pk=None):
         """Short link."""
-        self.get_object()
-        original_url = request.META.get('HTTP_REFERER')
-        if original_url is None:
-            url = reverse('api:recipe-detail', kwargs={'pk': pk})
-            original_url = request.build_absolute_uri(url)
-        serializer = self.get_serializer(
-            data={'original_url': original_url},
-            context={'request': request},
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-
+        try:
+            link = LinkMapped.objects.only('url_hash').get(
+                recipe__in=models.Recipe.objects.visible().filter(pk=pk)
+            )
+        except (LinkMapped.DoesNotExist, ValueError):
+            recipe = get_object_or_404(
+                models.Recipe.objects.visible().only('id'), pk=pk
+            )
+            link = LinkMapped.get_or_create_for_recipe(recipe.id)
+        serializer = self.get_serializer(link)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def perform_destroy(self, instance):
+        schedule_deletion(instance)
+
     def _post_author_recipe(self, request, pk):
         """Add authors recipe."""
         serializer = self.get_serializer(data=dict(recipe=pk))
@@ -166,13 +218,13 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     def _delete_author_recipe(self, request, pk, model):
         """Del author recipe."""
-        recipe = get_object_or_404(models.Recipe, pk=pk)
-        obj_count, _ = model.objects.filter(
-            author=self.request.user,
-            recipe=recipe,
-        ).delete()
-
-        if not obj_count:
+        try:
+            deleted, recipe_exists = model.remove(self.request.user.id, pk)
+        except ValueError:
+            raise Http404
+        if not recipe_exists:
+            raise Http404
+        if not deleted:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
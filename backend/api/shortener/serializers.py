@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 
-from shortener.models import LinkMapped
+from core.timing import SerializeTimingMixin
+from shortener.models import LinkMapped, LinkStats, canonical_url
 from recipes.models import Recipe
 
 
@@ -13,6 +14,12 @@ class ShortenerSerializer(serializers.ModelSerializer):
         fields = ('original_url',)
         write_only_fields = ('original_url',)
 
+    def validate_original_url(self, original_url):
+        try:
+            return canonical_url(original_url)
+        except ValueError:
+            raise serializers.ValidationError('Некорректная ссылка.')
+
     def get_short_link(self, obj):
         request = self.context.get('request')
         return request.build_absolute_uri(
@@ -23,8 +30,9 @@ class ShortenerSerializer(serializers.ModelSerializer):
         )
 
     def create(self, validated_data):
-        instance, _ = LinkMapped.objects.get_or_create(**validated_data)
-        return instance
+        return LinkMapped.get_or_create_for_url(
+            validated_data['original_url']
+        )
 
     def to_representation(self, instance):
         return {
@@ -32,7 +40,7 @@ class ShortenerSerializer(serializers.ModelSerializer):
         }
 
 
-class ShortRecipeSerializer(serializers.ModelSerializer):
+class ShortRecipeSerializer(SerializeTimingMixin, serializers.ModelSerializer):
     """Short data in recipes serializer."""
 
     class Meta:
@@ -43,3 +51,39 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
             'image',
             'cooking_time'
         )
+
+
+class LinkDayStatsSerializer(serializers.ModelSerializer):
+    """Short link clicks per day serializer."""
+
+    class Meta:
+        model = LinkStats
+        fields = (
+            'day',
+            'clicks'
+        )
+
+
+class LinkStatsSerializer(SerializeTimingMixin, serializers.ModelSerializer):
+    """Short link clicks serializer."""
+
+    clicks = serializers.IntegerField(read_only=True)
+    last_click = serializers.DateField(read_only=True)
+
+    class Meta:
+        model = LinkMapped
+        fields = (
+            'url_hash',
+            'original_url',
+            'clicks',
+            'last_click',
+        )
+
+
+class LinkStatsDetailSerializer(LinkStatsSerializer):
+    """Short link clicks with days serializer."""
+
+    days = LinkDayStatsSerializer(many=True, source='stats')
+
+    class Meta(LinkStatsSerializer.Meta):
+        fields = LinkStatsSerializer.Meta.fields + ('days',)
@@ -0,0 +1,6 @@
+from rest_framework import routers
+
+from . import views
+
+link_router = routers.DefaultRouter()
+link_router.register('links', views.LinkStatsViewSet, 'link')
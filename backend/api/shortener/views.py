@@ -0,0 +1,29 @@
+from django.db.models import Max, Sum
+from django.db.models.functions import Coalesce
+from rest_framework import permissions, viewsets
+
+from shortener.models import LinkMapped
+from ..paginations import FoodgramPagination
+from . import serializers
+
+
+class LinkStatsViewSet(viewsets.ReadOnlyModelViewSet):
+    """Short links clicks viewset."""
+
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = FoodgramPagination
+    lookup_field = 'url_hash'
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return serializers.LinkStatsDetailSerializer
+        return serializers.LinkStatsSerializer
+
+    def get_queryset(self):
+        qs = LinkMapped.objects.annotate(
+            clicks=Coalesce(Sum('stats__clicks'), 0),
+            last_click=Max('stats__day'),
+        )
+        if self.action == 'retrieve':
+            qs = qs.prefetch_related('stats')
+        return qs.order_by('-clicks', 'id')
@@ -0,0 +1,191 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.recipes.views import RecipeViewSet
+from core.benchmark import placeholder_image
+from core.budget import QueryBudgetExceeded
+from recipes.models import (
+    FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag,
+)
+from shortener import resolver
+from users import tokens
+from users.models import Subscriber, User
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """Every budgeted view stays within its budget with cold caches."""
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        cls.addClassCleanup(media.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {index}', slug=f'tag-{index}')
+            for index in range(3)
+        )
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {index}', measurement_unit='г')
+            for index in range(10)
+        )
+        cls.user, cls.author, cls.stranger, *followers = (
+            User.objects.create_user(
+                username=f'user{index}',
+                email=f'user{index}@example.com',
+                first_name='Имя',
+                last_name='Фамилия',
+                password='password',
+            )
+            for index in range(6)
+        )
+        Subscriber.objects.bulk_create(
+            Subscriber(user=follower, author=cls.user)
+            for follower in followers
+        )
+        Subscriber.objects.create(user=cls.user, author=cls.author)
+        cls.own = cls.create_recipes(cls.user, 3)[0]
+        cls.other = cls.create_recipes(cls.author, 5)[0]
+        FavoriteRecipe.objects.create(author=cls.user, recipe=cls.own)
+        ShoppingCart.objects.create(author=cls.user, recipe=cls.own)
+        cls.token = Token.objects.create(user=cls.user).key
+
+    @classmethod
+    def create_recipes(cls, author, count):
+        recipes = [
+            Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {author.username} {index}',
+                text='Описание',
+                cooking_time=10,
+                image='recipes/placeholder.png',
+            )
+            for index in range(count)
+        ]
+        for recipe in recipes:
+            recipe.tags.set(cls.tags[:2])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=5
+                )
+                for ingredient in cls.ingredients[:4]
+            )
+        return recipes
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def request(self, method, url, data=None):
+        cache.clear()
+        tokens.local_cache.clear()
+        resolver.local_cache.clear()
+        return getattr(self.client, method)(url, data, format='json')
+
+    def recipe_data(self):
+        return {
+            'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 2}
+                for ingredient in self.ingredients
+            ],
+            'image': placeholder_image(),
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 5,
+        }
+
+    def test_recipe_views(self):
+        other = self.other.id
+        calls = (
+            ('get', '/api/recipes/', None, 200),
+            ('get', '/api/recipes/?is_favorited=1', None, 200),
+            ('get', f'/api/recipes/{other}/', None, 200),
+            ('get', '/api/recipes/feed/', None, 200),
+            ('get', f'/api/recipes/{other}/get-link/', None, 200),
+            ('post', '/api/recipes/', self.recipe_data(), 201),
+            ('patch', f'/api/recipes/{self.own.id}/', self.recipe_data(), 200),
+            ('post', f'/api/recipes/{other}/favorite/', None, 201),
+            ('delete', f'/api/recipes/{other}/favorite/', None, 204),
+            ('post', f'/api/recipes/{other}/shopping_cart/', None, 201),
+            ('delete', f'/api/recipes/{other}/shopping_cart/', None, 204),
+            ('get', '/api/recipes/download_shopping_cart/', None, 200),
+            ('delete', f'/api/recipes/{self.own.id}/', None, 204),
+        )
+        for method, url, data, status in calls:
+            with self.subTest(method=method, url=url):
+                response = self.request(method, url, data)
+                self.assertEqual(response.status_code, status)
+
+    def test_user_views(self):
+        stranger = self.stranger.id
+        calls = (
+            ('get', '/api/users/', None, 200),
+            ('get', f'/api/users/{stranger}/', None, 200),
+            ('get', '/api/users/me/', None, 200),
+            ('get', '/api/users/subscriptions/?recipes_limit=2', None, 200),
+            ('post', f'/api/users/{stranger}/subscribe/', None, 201),
+            ('delete', f'/api/users/{stranger}/subscribe/', None, 204),
+            (
+                'put', '/api/users/me/avatar/',
+                {'avatar': placeholder_image()}, 200,
+            ),
+            ('delete', '/api/users/me/avatar/', None, 204),
+        )
+        for method, url, data, status in calls:
+            with self.subTest(method=method, url=url):
+                response = self.request(method, url, data)
+                self.assertEqual(response.status_code, status)
+
+    def test_reference_views(self):
+        calls = (
+            '/api/tags/',
+            f'/api/tags/{self.tags[0].id}/',
+            '/api/ingredients/?name=Ингр',
+            f'/api/ingredients/{self.ingredients[0].id}/',
+        )
+        for url in calls:
+            with self.subTest(url=url):
+                self.assertEqual(self.request('get', url).status_code, 200)
+
+    def test_patch_response_matches_read(self):
+        data = self.recipe_data()
+        # Новые ингредиенты впереди уже записанных.
+        data['ingredients'].reverse()
+        url = f'/api/recipes/{self.own.id}/'
+        written = self.request('patch', url, data).json()
+        self.assertEqual(written, self.request('get', url).json())
+
+    def test_exceeded_budget_rolls_back(self):
+        budget = {**RecipeViewSet.query_budget, 'favorite': 1}
+        with mock.patch.object(RecipeViewSet, 'query_budget', budget):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.request('post', f'/api/recipes/{self.other.id}/favorite/')
+        self.assertFalse(
+            FavoriteRecipe.objects.filter(
+                author=self.user, recipe=self.other
+            ).exists()
+        )
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_exceeded_budget_logged_in_production(self):
+        budget = {**RecipeViewSet.query_budget, 'favorite': 1}
+        with mock.patch.object(RecipeViewSet, 'query_budget', budget):
+            with self.assertLogs('core.middleware', 'WARNING') as logs:
+                response = self.request(
+                    'post', f'/api/recipes/{self.other.id}/favorite/'
+                )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('query_budget_exceeded', logs.output[0])
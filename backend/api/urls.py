@@ -1,5 +1,6 @@
 from django.urls import include, path
 
+from api.shortener.urls import link_router
 from api.users.urls import user_router
 
 app_name = 'api'
@@ -7,5 +8,6 @@ app_name = 'api'
 urlpatterns = [
     path('', include('api.recipes.urls')),
     path('', include(user_router.urls)),
+    path('', include(link_router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
@@ -1,15 +1,16 @@
 from django.contrib.auth import get_user_model
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from api.fileds import Base64ImageField
 from api.shortener.serializers import ShortRecipeSerializer
+from core.timing import SerializeTimingMixin
 from users.models import Subscriber
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SerializeTimingMixin, serializers.ModelSerializer):
     """User serializer."""
 
     is_subscribed = serializers.SerializerMethodField()
@@ -28,16 +29,13 @@ class UserSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         current_user = self.context['request'].user
-        if hasattr(obj, 'subs'):
-            return bool(obj.subs and obj.subs[0].is_subscribed)
         return (
-            current_user.is_authenticated
-            and current_user != obj
-            and obj.subscribers.filter(user=current_user).exists()
+            current_user != obj
+            and obj.id in Subscriber.get_following_ids(current_user)
         )
 
 
-class AvatarSerializer(serializers.ModelSerializer):
+class AvatarSerializer(SerializeTimingMixin, serializers.ModelSerializer):
     """Avatar serializer."""
 
     avatar = Base64ImageField(allow_null=True)
@@ -51,9 +49,7 @@ class UserRecipeSerializer(UserSerializer):
     """User recipes serializer."""
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        read_only=True, source='recipes.count'
-    )
+    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -71,7 +67,9 @@ class UserRecipeSerializer(UserSerializer):
 
     def get_recipes(self, obj):
         request = self.context['request']
-        recipes = obj.recipes.all()
+        recipes = getattr(obj, 'short_recipes', None)
+        if recipes is None:
+            recipes = obj.recipes.visible()
         try:
             recipes_limit = int(request.query_params.get('recipes_limit'))
         except (ValueError, TypeError):
@@ -81,6 +79,13 @@ class UserRecipeSerializer(UserSerializer):
 
         return ShortRecipeSerializer(recipes, many=True).data
 
+    def get_recipes_count(self, obj):
+        # Аннотация списка подписок, иначе отдельный COUNT.
+        recipes_count = getattr(obj, 'recipes_count', None)
+        if recipes_count is None:
+            recipes_count = obj.recipes.visible().count()
+        return recipes_count
+
 
 class SubscribeSerializer(serializers.ModelSerializer):
     """Subs serializer."""
@@ -114,4 +119,7 @@ class SubscribeSerializer(serializers.ModelSerializer):
         return author
 
     def to_representation(self, instance):
-        return UserRecipeSerializer(instance.author, context=self.context).data
+        author = instance.author
+        if hasattr(instance, 'recipes_count'):
+            author.recipes_count = instance.recipes_count
+        return UserRecipeSerializer(author, context=self.context).data
@@ -1,10 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Prefetch, Q
 from djoser import views as djoser_views
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from core.deletion import schedule_deletion
+from recipes.models import Recipe
 from users.models import Subscriber
 from ..paginations import FoodgramPagination
 from .serializers import AvatarSerializer, SubscribeSerializer
@@ -16,43 +19,46 @@ class UserViewSet(djoser_views.UserViewSet):
     """User viewset."""
 
     pagination_class = FoodgramPagination
+    query_budget = {
+        'list': 6,
+        'retrieve': 5,
+        'me': 3,
+        'subscriptions': 7,
+        'subscribe': 15,
+        'unsubscribe': 9,
+        'avatar': 5,
+        'delete_avatar': 8,
+    }
 
     def get_queryset(self):
         user = self.request.user
         if self.action in ('list', 'retrieve'):
-            return (
-                User.objects.prefetch_related(
-                    Subscriber.get_prefetch_subscribers(
-                        'subscribers',
-                        user
-                    ),
-                )
-                .order_by('id')
-                .all()
-            )
+            return User.objects.filter(is_hidden=False).order_by('id').all()
 
         if self.action in ('subscriptions',):
+            recipes = Recipe.objects.filter(is_hidden=False)
+            try:
+                recipes = recipes[:int(
+                    self.request.query_params.get('recipes_limit')
+                )]
+            except (ValueError, TypeError):
+                pass
             return (
                 user.subscriber
-                .prefetch_related(
-                    Subscriber.get_prefetch_subscribers(
-                        'author__subscribers', user
-                    ),
+                .filter(author__is_hidden=False)
+                .select_related('author')
+                .annotate(recipes_count=Count(
                     'author__recipes',
-                )
+                    filter=Q(author__recipes__is_hidden=False),
+                ))
+                .prefetch_related(Prefetch(
+                    'author__recipes', recipes, to_attr='short_recipes'
+                ))
                 .order_by('id')
                 .all()
             )
 
-        if self.action in ('subscribe',):
-            return User.objects.prefetch_related(
-                Subscriber.get_prefetch_subscribers(
-                    'subscribers',
-                    user
-                ),
-            ).all()
-
-        return User.objects.all()
+        return User.objects.filter(is_hidden=False)
 
     @action(
         methods=['get'],
@@ -130,6 +136,9 @@ class UserViewSet(djoser_views.UserViewSet):
             return Response(status=status.HTTP_400_BAD_REQUEST)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def perform_destroy(self, instance):
+        schedule_deletion(instance)
+
     def _change_avatar(self, data):
         instance = self.get_instance()
         serializer = AvatarSerializer(instance, data=data)
@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
 
 
 class AuthorModel(models.Model):
@@ -28,6 +28,100 @@ class AuthorRecipeModel(AuthorModel):
         abstract = True
 
 
+class RecipeListMixin:
+    """
+    Add and remove methods of user recipe lists (favorites, cart).
+
+    The model has `author` and `recipe` foreign keys and a unique
+    constraint on them.
+    """
+
+    @classmethod
+    def add(cls, author_id, recipe_id, fields):
+        """
+        Add the recipe unless it is already added.
+
+        :return: (recipe with `fields` loaded or None, created)
+        """
+        recipe_model = cls._meta.get_field('recipe').related_model
+        # from_db() ждёт значения в порядке полей модели.
+        fields = [
+            field.attname for field in recipe_model._meta.concrete_fields
+            if field.attname in fields or field.name in fields
+        ]
+        if connection.vendor == 'postgresql':
+            row = cls._insert_returning(
+                recipe_model, author_id, recipe_id, fields
+            )
+            if row is None:
+                return None, False
+            *values, created = row
+        else:
+            values = recipe_model.objects.visible().filter(
+                pk=recipe_id
+            ).values_list(*fields).first()
+            if values is None:
+                return None, False
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        author_id=author_id, recipe_id=recipe_id
+                    )
+                created = True
+            except IntegrityError:
+                created = False
+        return recipe_model.from_db(connection.alias, fields, values), created
+
+    @classmethod
+    def _insert_returning(cls, recipe_model, author_id, recipe_id, fields):
+        # Вставка и чтение рецепта одним запросом: конфликт не ошибка,
+        # а отсутствие строки в RETURNING. Скрытый рецепт не попадает
+        # в visible, как и отсутствующий.
+        quote = connection.ops.quote_name
+        recipe_pk = recipe_model._meta.pk.attname
+        visible_sql, visible_params = (
+            recipe_model.objects.visible().filter(pk=recipe_id).order_by()
+            .values(*dict.fromkeys([recipe_pk, *fields]))
+            .query.sql_with_params()
+        )
+        recipe_pk = quote(recipe_model._meta.pk.column)
+        author_column = quote(cls._meta.get_field('author').column)
+        recipe_column = quote(cls._meta.get_field('recipe').column)
+        columns = ', '.join(
+            f'visible.{quote(recipe_model._meta.get_field(field).column)}'
+            for field in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'WITH visible AS ({visible_sql}), inserted AS ('
+                f'INSERT INTO {quote(cls._meta.db_table)} '
+                f'({author_column}, {recipe_column}) '
+                f'SELECT %s, {recipe_pk} FROM visible '
+                f'ON CONFLICT ({author_column}, {recipe_column}) DO NOTHING '
+                f'RETURNING {recipe_column}) '
+                f'SELECT {columns}, inserted.{recipe_column} IS NOT NULL '
+                f'FROM visible LEFT JOIN inserted '
+                f'ON inserted.{recipe_column} = visible.{recipe_pk}',
+                [*visible_params, author_id],
+            )
+            return cursor.fetchone()
+
+    @classmethod
+    def remove(cls, author_id, recipe_id):
+        """
+        Remove the recipe with one DELETE.
+
+        :return: (deleted, recipe exists)
+        """
+        deleted, _ = cls.objects.filter(
+            author_id=author_id, recipe_id=recipe_id
+        ).delete()
+        if deleted:
+            return True, True
+        recipe_model = cls._meta.get_field('recipe').related_model
+        return False, recipe_model.objects.filter(pk=recipe_id).exists()
+
+
 class AuthorCreatedModel(AuthorModel):
     """Abstract create model by auth"""
 
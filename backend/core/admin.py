@@ -0,0 +1,59 @@
+from django.contrib import admin
+
+from .deletion import progress
+from .models import DeletionJob, SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Slow queries admin-zone"""
+
+    list_display = (
+        '__str__', 'view', 'calls', 'avg_ms', 'max_ms', 'total_ms',
+        'last_seen', 'has_plan',
+    )
+    list_filter = ('view',)
+    search_fields = ('sql', 'view')
+    readonly_fields = (
+        'fingerprint', 'sql', 'example', 'view', 'calls', 'total_ms',
+        'max_ms', 'plan', 'plan_captured_at', 'first_seen', 'last_seen',
+    )
+
+    @admin.display(description='Среднее, мс')
+    def avg_ms(self, obj):
+        return round(obj.avg_ms, 2)
+
+    @admin.display(description='План', boolean=True)
+    def has_plan(self, obj):
+        return bool(obj.plan)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    """Deletion jobs admin-zone"""
+
+    list_display = (
+        '__str__', 'status', 'progress', 'deleted_rows', 'created_at',
+        'updated_at', 'finished_at',
+    )
+    list_filter = ('status', 'target')
+    readonly_fields = (
+        'target', 'object_id', 'status', 'step', 'deleted_rows', 'error',
+        'created_at', 'updated_at', 'finished_at',
+    )
+
+    @admin.display(description='Шаг')
+    def progress(self, obj):
+        return progress(obj)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,216 @@
+import base64
+import io
+import statistics
+import tracemalloc
+from collections import namedtuple
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe
+from shortener.models import LinkMapped
+
+from .timing import RequestTimer
+
+User = get_user_model()
+
+Scenario = namedtuple('Scenario', 'name method url data')
+
+
+class Rollback(Exception):
+    """Undo the writes of a benchmark request."""
+
+
+def placeholder_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (2, 2)).save(buffer, 'PNG')
+    return (
+        'data:image/png;base64,'
+        + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+def get_bench_user(username=None):
+    """An author with the most subscriptions, or the given user."""
+    users = User.objects.filter(is_active=True)
+    if username:
+        return users.get(username=username)
+    return (
+        users.filter(recipes__isnull=False)
+        .annotate(following=Count('subscriber', distinct=True))
+        .order_by('-following', 'id')
+        .first()
+    )
+
+
+def build_scenarios(user):
+    """Endpoints of the suite against the current dataset."""
+    own = user.recipes.order_by('-created_at').first()
+    other = (
+        Recipe.objects.exclude(favorites__author=user)
+        .exclude(shopping_cart__author=user)
+        .order_by('-created_at')
+        .first()
+    )
+    link = LinkMapped.objects.filter(recipe__isnull=False).first()
+    ingredient = Ingredient.objects.order_by('id').first()
+    payload = {
+        'ingredients': [
+            {'id': pk, 'amount': 10}
+            for pk in own.ingredients.values_list('id', flat=True)[:5]
+        ] or [{'id': ingredient.id, 'amount': 10}],
+        'tags': list(own.tags.values_list('id', flat=True)),
+        'image': placeholder_image(),
+        'name': 'Benchmark',
+        'text': 'Benchmark',
+        'cooking_time': 10,
+    }
+    scenarios = [
+        Scenario('recipe_list', 'get', '/api/recipes/', None),
+        Scenario(
+            'recipe_list_filtered',
+            'get',
+            '/api/recipes/?is_favorited=1&is_in_shopping_cart=0',
+            None,
+        ),
+        Scenario('recipe_retrieve', 'get', f'/api/recipes/{own.id}/', None),
+        Scenario('recipe_create', 'post', '/api/recipes/', payload),
+        Scenario(
+            'recipe_update', 'patch', f'/api/recipes/{own.id}/', payload
+        ),
+        Scenario('recipe_feed', 'get', '/api/recipes/feed/', None),
+        Scenario(
+            'shopping_cart_download',
+            'get',
+            '/api/recipes/download_shopping_cart/',
+            None,
+        ),
+        Scenario('user_list', 'get', '/api/users/', None),
+        Scenario(
+            'subscriptions',
+            'get',
+            '/api/users/subscriptions/?recipes_limit=3',
+            None,
+        ),
+        Scenario(
+            'ingredient_search',
+            'get',
+            f'/api/ingredients/?name={ingredient.name[:2]}',
+            None,
+        ),
+    ]
+    if other:
+        scenarios += [
+            Scenario(
+                'favorite', 'post', f'/api/recipes/{other.id}/favorite/', None
+            ),
+            Scenario(
+                'shopping_cart',
+                'post',
+                f'/api/recipes/{other.id}/shopping_cart/',
+                None,
+            ),
+        ]
+    if link:
+        scenarios.append(
+            Scenario('load_url', 'get', f'/s/{link.url_hash}/', None)
+        )
+    return scenarios
+
+
+def get_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def request(client, scenario):
+    """Run the scenario, rolling back whatever it wrote."""
+    send = getattr(client, scenario.method)
+    if scenario.method == 'get':
+        response = send(scenario.url)
+    else:
+        try:
+            with transaction.atomic():
+                response = send(scenario.url, scenario.data, format='json')
+                raise Rollback
+        except Rollback:
+            pass
+    if response.status_code >= 400:
+        raise ValueError(
+            f'{scenario.name}: {response.status_code} '
+            f'{response.content[:200]!r}'
+        )
+    return response
+
+
+def percentile(values, percent):
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[
+        percent - 1
+    ]
+
+
+def measure(client, scenario, iterations, warmup):
+    """Wall time percentiles, SQL and allocations of one scenario."""
+    for _ in range(warmup):
+        request(client, scenario)
+
+    timings = []
+    for _ in range(iterations):
+        started = perf_counter()
+        request(client, scenario)
+        timings.append((perf_counter() - started) * 1000)
+
+    # Время запросов в журнале соединения округлено до миллисекунд.
+    timer = RequestTimer()
+    with connection.execute_wrapper(timer):
+        request(client, scenario)
+    sql_ms = timer.db * 1000
+    query_count = timer.queries
+
+    # Трассировка замедляет запрос, поэтому память считаем отдельно.
+    tracemalloc.start()
+    try:
+        request(client, scenario)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': query_count,
+        'sql_ms': round(sql_ms, 3),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Regressions of the results against a baseline."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: queries {previous["queries"]} -> '
+                f'{current["queries"]}'
+            )
+        for metric in ('p50_ms', 'p95_ms', 'peak_kb'):
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(
+                    f'{name}: {metric} {previous[metric]} -> '
+                    f'{current[metric]}'
+                )
+    return regressions
@@ -0,0 +1,72 @@
+"""
+Per-view SQL query budgets.
+
+A view declares `query_budget`: a number, or on a viewset an
+{action: number} dict. `QueryBudgetMiddleware` counts the queries of the
+request, transaction control statements aside. With `QUERY_BUDGET_STRICT`
+(development, tests, benchmarks) a budgeted view runs in a transaction,
+and over budget it is rolled back and `QueryBudgetExceeded` lists the
+queries. In production only the count is kept: over budget a warning is
+logged and `foodgram_query_budget_exceeded` counted.
+"""
+from collections import Counter
+
+from .slow_queries import normalize
+
+REPEATED_SHOWN = 3
+# Зависят от вложенности atomic и бэкенда, а не от кода представления.
+TRANSACTION_STATEMENTS = (
+    'BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT',
+)
+
+
+class QueryBudgetExceeded(Exception):
+
+    def __init__(self, view, budget, queries):
+        self.view = view
+        self.budget = budget
+        self.queries = queries
+        super().__init__(
+            f'{view}: {len(queries)} queries, budget {budget}\n'
+            + '\n'.join(
+                f'{number}. {sql}'
+                for number, sql in enumerate(queries, start=1)
+            )
+        )
+
+
+class QueryLog:
+    """
+    `connection.execute_wrapper` hook counting the statements.
+
+    :param capture: also keep the statements.
+    """
+
+    def __init__(self, capture=False):
+        self.count = 0
+        self.queries = [] if capture else None
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(TRANSACTION_STATEMENTS):
+            self.count += 1
+            if self.queries is not None:
+                self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+def get_budget(request):
+    """Budget of the resolved view and action, or None."""
+    match = request.resolver_match
+    if match is None:
+        return None
+    view = match.func
+    budget = getattr(getattr(view, 'cls', view), 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(view, 'actions', None) or {}
+        budget = budget.get(actions.get(request.method.lower()))
+    return budget
+
+
+def repeated(queries):
+    """The most repeated normalized statements, N+1 candidates."""
+    return Counter(map(normalize, queries)).most_common(REPEATED_SHOWN)
@@ -13,6 +13,8 @@ MIN_HASH = 8
 MAX_HASH = 10
 MAX_HASH_LEN = 15
 URL_LEN = 256
+# Recipe page of the frontend, canonical short link target.
+RECIPE_URL = '/recipes/{}'
 PAGE_SIZE = 6
 
 MIN_VALUE_MSG = 'Минимальное значение - 1.'
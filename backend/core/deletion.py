@@ -0,0 +1,173 @@
+"""
+Chunked deletion of users and recipes.
+
+`schedule_deletion` hides the object at once, reads filter hidden rows
+out, and queues a `DeletionJob`. `process_deletions` runs the job plan:
+the rows referencing the object are deleted step by step in batches, each
+in its own short transaction, the object itself last. The finished step
+is stored with the job, so an interrupted job resumes where it stopped.
+
+Batches are deleted without signals and cascades: the plan lists every
+referencing table, and the side effects of the per-row signals (files to
+sweep, cache invalidation) run once per batch from `BEFORE_DELETE`.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import files
+from .models import DeletionJob
+
+
+def recipe_dependents(lookup, value):
+    """Tables referencing the recipes matched by `lookup=value`."""
+    recipe_model = apps.get_model('recipes', 'Recipe')
+    condition = Q(**{lookup: value})
+    return [
+        (apps.get_model('recipes', 'RecipeIngredient'), condition),
+        (recipe_model.tags.through, condition),
+        (apps.get_model('recipes', 'FavoriteRecipe'), condition),
+        (apps.get_model('recipes', 'ShoppingCart'), condition),
+        (apps.get_model('recipes', 'FeedRecipe'), condition),
+        (
+            apps.get_model('shortener', 'LinkStats'),
+            Q(**{f'link__{lookup}': value}),
+        ),
+        (apps.get_model('shortener', 'LinkMapped'), condition),
+    ]
+
+
+def recipe_plan(pk):
+    return [
+        *recipe_dependents('recipe_id', pk),
+        (apps.get_model('recipes', 'Recipe'), Q(pk=pk)),
+    ]
+
+
+def user_plan(pk):
+    user_model = apps.get_model('users', 'User')
+    return [
+        *recipe_dependents('recipe__author_id', pk),
+        (apps.get_model('recipes', 'Recipe'), Q(author_id=pk)),
+        (apps.get_model('recipes', 'FavoriteRecipe'), Q(author_id=pk)),
+        (apps.get_model('recipes', 'ShoppingCart'), Q(author_id=pk)),
+        (apps.get_model('recipes', 'FeedRecipe'), Q(user_id=pk)),
+        (
+            apps.get_model('users', 'Subscriber'),
+            Q(author_id=pk) | Q(user_id=pk),
+        ),
+        (apps.get_model('authtoken', 'Token'), Q(user_id=pk)),
+        (apps.get_model('admin', 'LogEntry'), Q(user_id=pk)),
+        (user_model.groups.through, Q(user_id=pk)),
+        (user_model.user_permissions.through, Q(user_id=pk)),
+        (user_model, Q(pk=pk)),
+    ]
+
+
+PLANS = {
+    'recipes.recipe': recipe_plan,
+    'users.user': user_plan,
+}
+
+
+def invalidate_following(rows):
+    from users.models import Subscriber
+
+    user_ids = list(set(rows.values_list('user_id', flat=True)))
+    transaction.on_commit(
+        lambda: Subscriber.invalidate_following(*user_ids)
+    )
+
+
+def invalidate_links(rows):
+    from shortener import resolver
+
+    url_hashes = list(rows.values_list('url_hash', flat=True))
+    transaction.on_commit(lambda: resolver.invalidate(*url_hashes))
+
+
+def invalidate_tokens(rows):
+    from users import tokens
+
+    keys = list(rows.values_list('key', flat=True))
+    transaction.on_commit(lambda: tokens.invalidate(*keys))
+
+
+# Что делали бы сигналы post_delete, один раз на порцию. Ленты
+# подписчиков (prune_feed) удаляет сам план.
+BEFORE_DELETE = {
+    'recipes.recipe': files.schedule_queryset,
+    'users.user': files.schedule_queryset,
+    'users.subscriber': invalidate_following,
+    'shortener.linkmapped': invalidate_links,
+    'authtoken.token': invalidate_tokens,
+}
+
+
+def schedule_deletion(instance):
+    """Hide the user or recipe and queue its deletion."""
+    target = instance._meta.label_lower
+    if target not in PLANS:
+        raise ValueError(f'{target} cannot be deleted in batches')
+
+    instance.is_hidden = True
+    update_fields = ['is_hidden']
+    if target == 'users.user':
+        # Токены скрытого пользователя перестают действовать сразу.
+        instance.is_active = False
+        update_fields.append('is_active')
+    with transaction.atomic():
+        instance.save(update_fields=update_fields)
+        DeletionJob.objects.get_or_create(target=target, object_id=instance.pk)
+
+
+def delete_batch(model, condition, batch_size):
+    """Delete up to `batch_size` matching rows, None when none are left."""
+    with transaction.atomic():
+        ids = list(
+            model._base_manager.filter(condition)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return None
+        rows = model._base_manager.filter(pk__in=ids)
+        before_delete = BEFORE_DELETE.get(model._meta.label_lower)
+        if before_delete is not None:
+            before_delete(rows)
+        return rows._raw_delete(rows.db)
+
+
+def run(job, batch_size, on_batch=None):
+    """
+    Run the remaining steps of the job.
+
+    :param on_batch: called with (job, step model, deleted rows) after
+                     every batch.
+    """
+    steps = PLANS[job.target](job.object_id)
+    job.status = DeletionJob.RUNNING
+    job.error = ''
+    job.save(update_fields=['status', 'error', 'updated_at'])
+
+    for index in range(job.step, len(steps)):
+        model, condition = steps[index]
+        while True:
+            deleted = delete_batch(model, condition, batch_size)
+            if deleted is None:
+                break
+            job.deleted_rows += deleted
+            job.save(update_fields=['deleted_rows', 'updated_at'])
+            if on_batch is not None:
+                on_batch(job, model, deleted)
+        job.step = index + 1
+        job.save(update_fields=['step', 'updated_at'])
+
+    job.status = DeletionJob.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at', 'updated_at'])
+
+
+def progress(job):
+    """'step/steps' of the job."""
+    return f'{job.step}/{len(PLANS[job.target](job.object_id))}'
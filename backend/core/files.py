@@ -0,0 +1,208 @@
+"""
+Deferred media cleanup.
+
+Models decorated with `track_files` do not touch the storage in the
+request: replaced and deleted files are recorded in `PendingFileDeletion`
+with one INSERT after the transaction commits, and `sweep_media` deletes
+them in batches.
+A file still referenced by any tracked row is never deleted, so shared
+files (e.g. seed placeholders) are safe.
+"""
+import logging
+import os
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import FileField
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from .models import PendingFileDeletion
+
+logger = logging.getLogger(__name__)
+
+TRACKED_MODELS = []
+
+
+def file_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField)
+    ]
+
+
+def file_name(instance, field):
+    """Stored name or None, files not saved yet have none."""
+    value = instance.__dict__.get(field.attname)
+    if isinstance(value, FieldFile):
+        value = value.name
+    return value if isinstance(value, str) and value else None
+
+
+def remember_files(sender, instance, **kwargs):
+    instance._stored_files = {
+        field.attname: file_name(instance, field)
+        for field in file_fields(sender)
+        if field.attname in instance.__dict__
+    }
+
+
+def schedule(names):
+    """Record `names` after the commit, one INSERT per transaction."""
+    names = [name for name in names if name]
+    if not names:
+        return
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        PendingFileDeletion.record(names)
+        return
+    hooks, pending = getattr(connection, 'pending_file_names', (None, None))
+    # Список хуков пересоздается после commit и rollback, тогда прошлый
+    # батч уже записан или отброшен.
+    if hooks is not connection.run_on_commit:
+        pending = []
+        transaction.on_commit(
+            lambda: PendingFileDeletion.record(pending), robust=True
+        )
+        connection.pending_file_names = (connection.run_on_commit, pending)
+    pending.extend(names)
+
+
+def schedule_queryset(queryset):
+    """Files of the rows about to be deleted with `queryset`."""
+    schedule(
+        name
+        for field in file_fields(queryset.model)
+        for name in queryset.values_list(field.attname, flat=True)
+    )
+
+
+def files_replaced(sender, instance, **kwargs):
+    stored = instance._stored_files
+    replaced = []
+    for field in file_fields(sender):
+        if field.attname not in instance.__dict__:
+            continue
+        name = file_name(instance, field)
+        if stored.get(field.attname) != name:
+            replaced.append(stored.get(field.attname))
+        stored[field.attname] = name
+    schedule(replaced)
+
+
+def files_deleted(sender, instance, **kwargs):
+    schedule(
+        file_name(instance, field) or instance._stored_files.get(
+            field.attname
+        )
+        for field in file_fields(sender)
+    )
+
+
+def track_files(model):
+    """Class decorator, replaces `django_cleanup.cleanup_select`."""
+    TRACKED_MODELS.append(model)
+    post_init.connect(remember_files, sender=model, weak=False)
+    post_save.connect(files_replaced, sender=model, weak=False)
+    post_delete.connect(files_deleted, sender=model, weak=False)
+    return model
+
+
+def referenced_names(names):
+    """Names of `names` still used by tracked rows."""
+    referenced = set()
+    for model in TRACKED_MODELS:
+        for field in file_fields(model):
+            referenced.update(
+                model._base_manager.filter(
+                    **{f'{field.name}__in': names}
+                ).values_list(field.attname, flat=True)
+            )
+    return referenced
+
+
+def sweep(batch_size, storage=default_storage):
+    """Delete pending files batch by batch, return deleted count."""
+    deleted = 0
+    while True:
+        batch = list(
+            PendingFileDeletion.objects.values_list('id', 'name')[:batch_size]
+        )
+        if not batch:
+            return deleted
+        referenced = referenced_names([name for _, name in batch])
+        for _, name in batch:
+            if name in referenced:
+                continue
+            try:
+                storage.delete(name)
+                deleted += 1
+            except OSError:
+                logger.exception('Could not delete %s', name)
+        PendingFileDeletion.objects.filter(
+            id__in=[pk for pk, _ in batch]
+        ).delete()
+
+
+def walk(storage, path):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name)
+    for directory in directories:
+        yield from walk(storage, os.path.join(path, directory))
+
+
+def upload_dirs():
+    return {
+        field.upload_to.strip('/')
+        for model in TRACKED_MODELS
+        for field in file_fields(model)
+        if isinstance(field.upload_to, str)
+    }
+
+
+def find_orphans(min_age, batch_size, storage=default_storage):
+    """
+    Files under the upload directories referenced by no row.
+
+    Files younger than `min_age` are skipped: their rows may be in an
+    uncommitted transaction yet.
+    """
+    threshold = timezone.now() - min_age
+    for directory in upload_dirs():
+        if not storage.exists(directory):
+            continue
+        names = []
+        for name in walk(storage, directory):
+            names.append(name)
+            if len(names) >= batch_size:
+                yield from unreferenced(names, threshold, storage)
+                names = []
+        yield from unreferenced(names, threshold, storage)
+
+
+def unreferenced(names, threshold, storage):
+    if not names:
+        return
+    referenced = referenced_names(names)
+    for name in names:
+        if name not in referenced and (
+            storage.get_modified_time(name) < threshold
+        ):
+            yield name
+
+
+def reconcile(min_age=timedelta(days=1), batch_size=500):
+    """Record orphaned files for the sweeper, return their count."""
+    count = 0
+    batch = []
+    for name in find_orphans(min_age, batch_size):
+        batch.append(name)
+        if len(batch) >= batch_size:
+            PendingFileDeletion.record(batch)
+            count += len(batch)
+            batch = []
+    PendingFileDeletion.record(batch)
+    return count + len(batch)
@@ -0,0 +1,212 @@
+import http.client
+import random
+import statistics
+import threading
+from collections import defaultdict
+from time import monotonic, perf_counter
+from urllib.parse import quote, urlsplit
+
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+from core.constants import PAGE_SIZE
+from recipes.models import Ingredient, Recipe
+from shortener.models import LinkMapped
+
+User = get_user_model()
+
+DEFAULT_MIX = {
+    'browse': 50,
+    'search': 15,
+    'favorite': 12,
+    'cart': 10,
+    'redirect': 10,
+    'pdf': 3,
+}
+SAMPLE_SIZE = 1000
+
+
+def parse_mix(value):
+    """'browse=50,pdf=3' -> {'browse': 50, 'pdf': 3}"""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in DEFAULT_MIX:
+            raise ValueError(f'Unknown scenario {name!r}.')
+        mix[name] = float(weight)
+    return mix
+
+
+class Dataset:
+    """Ids, tokens and search prefixes sampled from the database."""
+
+    def __init__(self, users):
+        self.tokens = [
+            Token.objects.get_or_create(user_id=user_id)[0].key
+            for user_id in User.objects.filter(is_active=True)
+            .order_by('?').values_list('id', flat=True)[:users]
+        ]
+        self.recipe_ids = list(
+            Recipe.objects.order_by('?').values_list('id', flat=True)[
+                :SAMPLE_SIZE
+            ]
+        )
+        self.pages = max(Recipe.objects.count() // PAGE_SIZE, 1)
+        self.prefixes = sorted({
+            name[:2] for name in Ingredient.objects.order_by('?')
+            .values_list('name', flat=True)[:SAMPLE_SIZE]
+        })
+        self.hashes = list(
+            LinkMapped.objects.order_by('?').values_list(
+                'url_hash', flat=True
+            )[:SAMPLE_SIZE]
+        )
+
+
+class Stats:
+    """Latencies and errors per endpoint, shared by the threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, endpoint, elapsed, error):
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            if error:
+                self.errors[endpoint] += 1
+
+    def report(self, duration):
+        report = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            quantiles = (
+                statistics.quantiles(latencies, n=100, method='inclusive')
+                if len(latencies) > 1 else latencies * 99
+            )
+            report[endpoint] = {
+                'requests': len(latencies),
+                'rps': round(len(latencies) / duration, 2),
+                'p50_ms': round(quantiles[49], 2),
+                'p95_ms': round(quantiles[94], 2),
+                'p99_ms': round(quantiles[98], 2),
+                'max_ms': round(latencies[-1], 2),
+                'error_rate': round(
+                    self.errors[endpoint] / len(latencies), 4
+                ),
+            }
+        return report
+
+
+class Client(threading.Thread):
+    """One keep-alive connection running a random scenario mix."""
+
+    def __init__(self, url, dataset, mix, stats, deadline, seed):
+        super().__init__(daemon=True)
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.dataset = dataset
+        self.stats = stats
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.token = (
+            self.rng.choice(dataset.tokens) if dataset.tokens else None
+        )
+        self.connection = None
+
+    def run(self):
+        while monotonic() < self.deadline:
+            name = self.rng.choices(self.names, self.weights)[0]
+            getattr(self, name)()
+
+    def send(self, endpoint, method, path, auth=False, expected=()):
+        """Request timing; statuses >= 400 not in expected are errors."""
+        headers = {}
+        if auth:
+            headers['Authorization'] = f'Token {self.token}'
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=30
+            )
+        started = perf_counter()
+        try:
+            self.connection.request(method, path, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            status = None
+        elapsed = (perf_counter() - started) * 1000
+        self.stats.add(
+            endpoint,
+            elapsed,
+            status is None or (status >= 400 and status not in expected),
+        )
+        return status
+
+    def browse(self):
+        page = self.rng.randint(1, min(self.dataset.pages, 20))
+        self.send('recipe_list', 'GET', f'/api/recipes/?page={page}')
+        if self.dataset.recipe_ids:
+            recipe_id = self.rng.choice(self.dataset.recipe_ids)
+            self.send('recipe_retrieve', 'GET', f'/api/recipes/{recipe_id}/')
+
+    def search(self):
+        if self.dataset.prefixes:
+            prefix = self.rng.choice(self.dataset.prefixes)
+            self.send(
+                'ingredient_search',
+                'GET',
+                f'/api/ingredients/?name={quote(prefix)}',
+            )
+
+    def toggle(self, action):
+        if not (self.token and self.dataset.recipe_ids):
+            return
+        path = (
+            f'/api/recipes/{self.rng.choice(self.dataset.recipe_ids)}'
+            f'/{action}/'
+        )
+        if self.send(f'{action}_add', 'POST', path, True, (400,)) == 400:
+            self.send(f'{action}_remove', 'DELETE', path, True)
+
+    def favorite(self):
+        self.toggle('favorite')
+
+    def cart(self):
+        self.toggle('shopping_cart')
+
+    def pdf(self):
+        if self.token:
+            self.send(
+                'shopping_cart_download',
+                'GET',
+                '/api/recipes/download_shopping_cart/',
+                True,
+            )
+
+    def redirect(self):
+        if self.dataset.hashes:
+            url_hash = self.rng.choice(self.dataset.hashes)
+            self.send('load_url', 'GET', f'/s/{url_hash}/')
+
+
+def run(url, dataset, mix, concurrency, duration, seed=None):
+    """Drive the mix from concurrent clients, report per endpoint."""
+    stats = Stats()
+    rng = random.Random(seed)
+    started = monotonic()
+    clients = [
+        Client(url, dataset, mix, stats, started + duration, rng.random())
+        for _ in range(concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return stats.report(monotonic() - started)
@@ -0,0 +1,112 @@
+import json
+import platform
+import tempfile
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.benchmark import (
+    build_scenarios, compare, get_bench_user, get_client, measure,
+)
+
+
+class Command(BaseCommand):
+    """In-process API benchmark"""
+
+    help = (
+        'Benchmark API endpoints against the current dataset '
+        '(see seed_scale): latency percentiles, SQL queries and time, '
+        'peak allocations. Writes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--user', help='Username to benchmark as.')
+        parser.add_argument(
+            '--only', nargs='+', default=None, help='Scenario names.'
+        )
+        parser.add_argument('--output', help='Save results as JSON.')
+        parser.add_argument('--compare', help='Baseline JSON to compare.')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Allowed relative slowdown, 0.2 is 20%%.',
+        )
+
+    def handle(self, *args, **options):
+        user = get_bench_user(options['user'])
+        if user is None:
+            raise CommandError('No authors found, run seed_scale first.')
+        scenarios = build_scenarios(user)
+        if options['only']:
+            scenarios = [
+                scenario for scenario in scenarios
+                if scenario.name in options['only']
+            ]
+
+        results = {}
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            MEDIA_ROOT=media_root,
+            QUERY_BUDGET_STRICT=True,
+        ):
+            client = get_client(user)
+            for scenario in scenarios:
+                try:
+                    results[scenario.name] = measure(
+                        client,
+                        scenario,
+                        options['iterations'],
+                        options['warmup'],
+                    )
+                except ValueError as error:
+                    raise CommandError(error)
+                self.stdout.write(self.format_row(
+                    scenario.name, results[scenario.name]
+                ))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(
+                    {
+                        'meta': {
+                            'created_at': timezone.now().isoformat(),
+                            'python': platform.python_version(),
+                            'django': django.get_version(),
+                            'database': settings.DATABASES['default'][
+                                'ENGINE'
+                            ],
+                            'user': user.username,
+                            'iterations': options['iterations'],
+                        },
+                        'results': results,
+                    },
+                    file,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)['results']
+            regressions = compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    'Regressions:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    @staticmethod
+    def format_row(name, result):
+        return (
+            f'{name:24} p50 {result["p50_ms"]:8.2f}ms '
+            f'p95 {result["p95_ms"]:8.2f}ms '
+            f'p99 {result["p99_ms"]:8.2f}ms '
+            f'sql {result["queries"]:3} / {result["sql_ms"]:7.2f}ms '
+            f'peak {result["peak_kb"]:8.1f}KB'
+        )
@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core.benchmark import build_scenarios, get_bench_user, get_client
+from core.plans import check_scenario, table_rows
+
+
+class Command(BaseCommand):
+    """Query plan regression check"""
+
+    help = (
+        'Explain the queries of every benchmark scenario on a large '
+        'dataset (see seed_scale) and fail on sequential scans of large '
+        'tables, unused expected indexes and oversized row estimates. '
+        'PostgreSQL only.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=10_000,
+            help='Tables this large must not be scanned sequentially.',
+        )
+        parser.add_argument(
+            '--max-rows',
+            type=int,
+            default=10_000,
+            help='Upper bound for the estimated rows of a query.',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Refresh planner statistics first.',
+        )
+        parser.add_argument('--user', help='Username to check as.')
+        parser.add_argument(
+            '--only', nargs='+', default=None, help='Scenario names.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plans are checked on PostgreSQL only.')
+        user = get_bench_user(options['user'])
+        if user is None:
+            raise CommandError('No authors found, run seed_scale first.')
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        rows = table_rows()
+        scenarios = build_scenarios(user)
+        if options['only']:
+            scenarios = [
+                scenario for scenario in scenarios
+                if scenario.name in options['only']
+            ]
+
+        failed = 0
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        ):
+            client = get_client(user)
+            for scenario in scenarios:
+                violations, indexes = check_scenario(
+                    client,
+                    scenario,
+                    rows,
+                    options['min_rows'],
+                    options['max_rows'],
+                )
+                if violations:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(scenario.name))
+                    for violation in violations:
+                        self.stdout.write(f'  {violation}')
+                else:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'{scenario.name}: {", ".join(sorted(indexes))}'
+                    ))
+
+        if failed:
+            raise CommandError(f'{failed} scenarios have plan regressions.')
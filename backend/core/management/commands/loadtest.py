@@ -0,0 +1,142 @@
+import json
+import os
+import shlex
+import socket
+import subprocess
+import sys
+from time import monotonic, sleep
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import DEFAULT_MIX, Dataset, parse_mix, run
+
+STARTUP_TIMEOUT = 30
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    """Concurrent load test"""
+
+    help = (
+        'Start the app under gunicorn (or use --url) and drive a mix of '
+        'browsing, favorites and cart toggles, ingredient search, PDF '
+        'downloads and short-link redirects. Reports throughput, latency '
+        'percentiles and error rates per endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', help='Running deployment, gunicorn is not started.'
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--threads', type=int, default=1)
+        parser.add_argument(
+            '--gunicorn-args', default='', help='Extra gunicorn options.'
+        )
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument(
+            '--users', type=int, default=50, help='Logged-in clients.'
+        )
+        parser.add_argument(
+            '--mix',
+            type=parse_mix,
+            default=DEFAULT_MIX,
+            help='Scenario weights, e.g. "browse=50,favorite=10,pdf=2".',
+        )
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', help='Save the report as JSON.')
+
+    def handle(self, *args, **options):
+        dataset = Dataset(options['users'])
+        if not dataset.recipe_ids:
+            raise CommandError('No recipes found, run seed_scale first.')
+
+        server = None
+        url = options['url']
+        if not url:
+            url = f'http://localhost:{free_port()}'
+            server = self.start_gunicorn(url, options)
+        try:
+            self.stdout.write(
+                f'{options["concurrency"]} clients for '
+                f'{options["duration"]}s against {url}'
+            )
+            report = run(
+                url,
+                dataset,
+                options['mix'],
+                options['concurrency'],
+                options['duration'],
+                options['seed'],
+            )
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+        total = sum(row['requests'] for row in report.values())
+        errors = sum(
+            row['requests'] * row['error_rate'] for row in report.values()
+        )
+        for endpoint, row in report.items():
+            self.stdout.write(
+                f'{endpoint:24} {row["requests"]:7} req '
+                f'{row["rps"]:8.1f} rps '
+                f'p50 {row["p50_ms"]:8.1f}ms p95 {row["p95_ms"]:8.1f}ms '
+                f'p99 {row["p99_ms"]:8.1f}ms '
+                f'errors {row["error_rate"]:.2%}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'total: {total} requests, '
+            f'{total / options["duration"]:.1f} rps, '
+            f'errors {errors / max(total, 1):.2%}'
+        ))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(
+                    {
+                        'url': url,
+                        'workers': None if server is None
+                        else options['workers'],
+                        'threads': None if server is None
+                        else options['threads'],
+                        'concurrency': options['concurrency'],
+                        'duration': options['duration'],
+                        'mix': options['mix'],
+                        'endpoints': report,
+                    },
+                    file,
+                    indent=2,
+                )
+
+    def start_gunicorn(self, url, options):
+        command = [
+            sys.executable, '-m', 'gunicorn', 'foodgram.wsgi',
+            '--bind', url.removeprefix('http://'),
+            '--workers', str(options['workers']),
+            *shlex.split(options['gunicorn_args']),
+        ]
+        # Через окружение, чтобы gunicorn.conf.py выбрал умолчания для
+        # потоков (перезапуск воркеров).
+        env = {**os.environ, 'GUNICORN_THREADS': str(options['threads'])}
+        server = subprocess.Popen(command, env=env)
+        deadline = monotonic() + STARTUP_TIMEOUT
+        while monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('gunicorn exited on startup.')
+            try:
+                urlopen(f'{url}/api/tags/', timeout=1).close()
+                return server
+            except (URLError, OSError):
+                sleep(0.2)
+        server.terminate()
+        raise CommandError('gunicorn did not start in time.')
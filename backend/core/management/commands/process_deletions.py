@@ -0,0 +1,70 @@
+import logging
+import traceback
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.deletion import progress, run
+from core.models import DeletionJob
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Delete hidden users and recipes with their rows in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between batches.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new jobs.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10,
+            help='Seconds between polls with --loop.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Прерванные и упавшие задачи продолжаются с сохраненного шага.
+            jobs = list(DeletionJob.objects.exclude(status=DeletionJob.DONE))
+            for job in jobs:
+                self.run_job(job, options)
+            if not options['loop']:
+                return
+            # Соединение переживает проход, как и запрос: CONN_MAX_AGE и
+            # проверка здоровья соблюдаются между проходами.
+            close_old_connections()
+            sleep(options['interval'])
+
+    def run_job(self, job, options):
+        def on_batch(job, model, deleted):
+            self.stdout.write(
+                f'{job}: step {progress(job)}, {model._meta.label} '
+                f'-{deleted}, {job.deleted_rows} rows total'
+            )
+            if options['pause']:
+                sleep(options['pause'])
+
+        try:
+            run(job, options['batch_size'], on_batch)
+        except Exception:
+            logger.exception('Deletion of %s failed', job)
+            job.status = DeletionJob.FAILED
+            job.error = traceback.format_exc()
+            job.save(update_fields=['status', 'error', 'updated_at'])
+            self.stderr.write(f'{job}: failed at step {progress(job)}')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'{job}: deleted, {job.deleted_rows} rows'
+            ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.timing import get_switch, reset_switch, set_switch
+
+
+class Command(BaseCommand):
+    """Server-Timing runtime switch"""
+
+    help = (
+        'Turn request timing on or off for all workers without a restart. '
+        'Workers pick the change up within SERVER_TIMING_SWITCH_TIMEOUT.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'state', choices=('on', 'off', 'status', 'reset')
+        )
+        parser.add_argument(
+            '--sample-rate', type=float, help='Share of requests to log.'
+        )
+        parser.add_argument(
+            '--slow-ms', type=int, help='Always log slower requests.'
+        )
+
+    def handle(self, *args, **options):
+        values = {}
+        if options['state'] in ('on', 'off'):
+            values['enabled'] = options['state'] == 'on'
+        if options['sample_rate'] is not None:
+            values['sample_rate'] = options['sample_rate']
+        if options['slow_ms'] is not None:
+            values['slow_ms'] = options['slow_ms']
+
+        if options['state'] == 'reset':
+            reset_switch()
+        elif values:
+            try:
+                set_switch(**values)
+            except ValueError as error:
+                raise CommandError(error)
+        self.stdout.write(str(get_switch()))
@@ -0,0 +1,56 @@
+from datetime import timedelta
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.files import reconcile, sweep
+
+
+class Command(BaseCommand):
+    help = 'Delete media files of replaced and deleted images in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--reconcile',
+            action='store_true',
+            help='Also find files under the upload directories '
+                 'referenced by no row.',
+        )
+        parser.add_argument(
+            '--orphan-age',
+            type=int,
+            default=24,
+            help='Hours an unreferenced file must exist to count as '
+                 'orphaned.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep sweeping.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=300,
+            help='Seconds between sweeps with --loop.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.sweep(options)
+            if not options['loop']:
+                return
+            close_old_connections()
+            sleep(options['interval'])
+
+    def sweep(self, options):
+        if options['reconcile']:
+            orphans = reconcile(
+                timedelta(hours=options['orphan_age']),
+                options['batch_size'],
+            )
+            self.stdout.write(f'Orphaned files: {orphans}')
+        deleted = sweep(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted files: {deleted}'))
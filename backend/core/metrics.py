@@ -0,0 +1,108 @@
+"""
+Prometheus metrics.
+
+Under gunicorn every worker writes its samples to files in
+`PROMETHEUS_MULTIPROC_DIR` (see gunicorn.conf.py), and `/metrics`
+merges them, so whichever worker answers the scrape reports totals.
+"""
+import os
+
+from django.urls import Resolver404, resolve
+from prometheus_client import (
+    REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess,
+)
+
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 10,
+)
+
+REQUESTS = Counter(
+    'foodgram_requests',
+    'Requests per view, method and status.',
+    ['view', 'method', 'status'],
+)
+REQUEST_DURATION = Histogram(
+    'foodgram_request_duration_seconds',
+    'Request latency per view.',
+    ['view', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'foodgram_db_queries_per_request',
+    'SQL queries per request.',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_DURATION = Histogram(
+    'foodgram_db_duration_seconds',
+    'SQL time per request.',
+    ['view'],
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_BUDGET_EXCEEDED = Counter(
+    'foodgram_query_budget_exceeded',
+    'Requests over the query budget of their view.',
+    ['view'],
+)
+CACHE_LOOKUPS = Counter(
+    'foodgram_cache_lookups',
+    'Cache lookups by cache and the level that answered.',
+    ['cache', 'result'],
+)
+PDF_DURATION = Histogram(
+    'foodgram_pdf_render_seconds',
+    'Shopping list PDF render time.',
+    buckets=LATENCY_BUCKETS,
+)
+IMAGE_DURATION = Histogram(
+    'foodgram_image_decode_seconds',
+    'Base64 image decoding and validation time.',
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def cache_lookup(cache, result):
+    """result: 'local', 'shared' or 'miss'."""
+    CACHE_LOOKUPS.labels(cache, result).inc()
+
+
+def view_label(request):
+    """`RecipeViewSet.list`, `load_url` and so on."""
+    match = request.resolver_match
+    if match is None:
+        # Ответы промежуточных слоев, например редиректы коротких ссылок.
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return 'unmatched'
+    view = match.func
+    view_class = getattr(view, 'cls', None)
+    if view_class is None:
+        return view.__name__
+    actions = getattr(view, 'actions', None)
+    if not actions:
+        return view_class.__name__
+    method = request.method.lower()
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+def observe_request(request, response, duration, timer):
+    view = view_label(request)
+    REQUESTS.labels(view, request.method, response.status_code).inc()
+    REQUEST_DURATION.labels(view, request.method).observe(duration)
+    DB_QUERIES.labels(view).observe(timer.queries)
+    DB_DURATION.labels(view).observe(timer.db)
+
+
+def render_metrics():
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
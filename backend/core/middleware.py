@@ -0,0 +1,218 @@
+import json
+import logging
+import random
+import threading
+from contextlib import ExitStack
+from time import perf_counter
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from .budget import QueryBudgetExceeded, QueryLog, get_budget, repeated
+from .metrics import QUERY_BUDGET_EXCEEDED, observe_request, view_label
+from .profiler import StackSampler, write_profile
+from .slow_queries import slow_queries
+from .timing import RequestTimer, get_switch
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """Request count, latency and SQL metrics per view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = RequestTimer()
+        started = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        observe_request(request, response, perf_counter() - started, timer)
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    `Server-Timing` header and timing logs for instrumented requests.
+
+    Phases are marked at the view call, at the first serializer
+    `to_representation` (see `SerializeTimingMixin`), before the DRF
+    response is rendered and after rendering.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        switch = get_switch()
+        if not switch['enabled']:
+            return self.get_response(request)
+
+        timer = request.timer = RequestTimer()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        timer.mark('end')
+
+        phases = timer.phases()
+        response['Server-Timing'] = timer.header(phases)
+        if phases['total'] >= switch['slow_ms']:
+            logger.warning(self.format(request, response, timer, phases))
+        elif random.random() < switch['sample_rate']:
+            logger.info(self.format(request, response, timer, phases))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timer = getattr(request, 'timer', None)
+        if timer is not None:
+            timer.mark('view')
+
+    def process_template_response(self, request, response):
+        timer = getattr(request, 'timer', None)
+        if timer is not None:
+            timer.mark('render')
+            response.add_post_render_callback(
+                lambda response: timer.mark('rendered')
+            )
+        return response
+
+    @staticmethod
+    def format(request, response, timer, phases):
+        match = request.resolver_match
+        user = getattr(request, 'user', None)
+        return json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'user_id': user.id if user is not None else None,
+            'queries': timer.queries,
+            **{f'{name}_ms': value for name, value in phases.items()},
+        })
+
+
+class ProfilerMiddleware:
+    """
+    Sample the stack of requests carrying the profiler token.
+
+    The token goes in the `X-Profile` header or the `profile` query
+    parameter. Profiles are kept for staff users only, and the profile id
+    is returned in `X-Profile-Id`. Without `PROFILER_TOKEN` the
+    middleware is not loaded at all.
+    """
+
+    param = 'profile'
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_TOKEN:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = (
+            request.headers.get('X-Profile')
+            or request.GET.get(self.param)
+        )
+        if not token or not constant_time_compare(
+            token, settings.PROFILER_TOKEN
+        ):
+            return self.get_response(request)
+
+        interval_ms = settings.PROFILER_INTERVAL_MS
+        sampler = StackSampler(threading.get_ident(), interval_ms / 1000)
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_staff:
+            return response
+        profile_id = f'{timezone.now():%Y%m%d-%H%M%S}-{uuid4().hex[:8]}'
+        write_profile(
+            profile_id,
+            f'{request.method} {request.get_full_path()}',
+            sampler.samples,
+            interval_ms,
+        )
+        response['X-Profile-Id'] = profile_id
+        return response
+
+
+class SlowQueryMiddleware:
+    """Queue queries slower than `SLOW_QUERY_MS` for the slow-query log."""
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.SLOW_QUERY_MS
+
+    def __call__(self, request):
+        def log_slow(execute, sql, params, many, context):
+            started = perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration_ms = (perf_counter() - started) * 1000
+                if duration_ms >= self.threshold:
+                    slow_queries.record(
+                        sql, params, many, duration_ms, view_label(request)
+                    )
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log_slow))
+            return self.get_response(request)
+
+
+class QueryBudgetMiddleware:
+    """Query budgets declared by views, see core.budget."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        strict = settings.QUERY_BUDGET_STRICT
+        log = QueryLog(capture=strict or settings.DEBUG)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            request.query_budget_stack = stack
+            response = self.get_response(request)
+            budget = get_budget(request)
+            exceeded = budget is not None and log.count > budget
+            if exceeded and strict:
+                raise QueryBudgetExceeded(
+                    view_label(request), budget, log.queries
+                )
+
+        if not exceeded:
+            return response
+        view = view_label(request)
+        QUERY_BUDGET_EXCEEDED.labels(view).inc()
+        details = {
+            'query_budget_exceeded': view,
+            'queries': log.count,
+            'budget': budget,
+        }
+        if log.queries is not None:
+            details['repeated'] = repeated(log.queries)
+        logger.warning(json.dumps(details))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Превышение откатывает запрос: ошибка не приходит после уже
+        # закоммиченной записи. Запросы без бюджета (короткие ссылки,
+        # метрики) обходятся без транзакции.
+        if settings.QUERY_BUDGET_STRICT and get_budget(request) is not None:
+            request.query_budget_stack.enter_context(transaction.atomic())
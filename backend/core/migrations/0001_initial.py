@@ -0,0 +1,88 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "fingerprint",
+                    models.CharField(
+                        max_length=32, unique=True, verbose_name="Отпечаток"
+                    ),
+                ),
+                ("sql", models.TextField(verbose_name="Запрос")),
+                (
+                    "example",
+                    models.TextField(
+                        blank=True, verbose_name="Пример параметров"
+                    ),
+                ),
+                (
+                    "view",
+                    models.CharField(
+                        blank=True,
+                        max_length=128,
+                        verbose_name="Представление",
+                    ),
+                ),
+                (
+                    "calls",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Вызовов"
+                    ),
+                ),
+                (
+                    "total_ms",
+                    models.FloatField(
+                        default=0, verbose_name="Общее время, мс"
+                    ),
+                ),
+                (
+                    "max_ms",
+                    models.FloatField(default=0, verbose_name="Максимум, мс"),
+                ),
+                ("plan", models.TextField(blank=True, verbose_name="План")),
+                (
+                    "plan_captured_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="План получен"
+                    ),
+                ),
+                (
+                    "first_seen",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Впервые"
+                    ),
+                ),
+                (
+                    "last_seen",
+                    models.DateTimeField(
+                        db_index=True, verbose_name="Последний раз"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Медленный запрос",
+                "verbose_name_plural": "Медленные запросы",
+                "ordering": ("-total_ms",),
+            },
+        ),
+    ]
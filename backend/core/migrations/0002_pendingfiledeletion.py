@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingFileDeletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="Файл"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Добавлен"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Файл к удалению",
+                "verbose_name_plural": "Файлы к удалению",
+                "ordering": ("id",),
+            },
+        ),
+    ]
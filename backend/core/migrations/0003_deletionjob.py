@@ -0,0 +1,91 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_pendingfiledeletion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeletionJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "target",
+                    models.CharField(max_length=64, verbose_name="Модель"),
+                ),
+                (
+                    "object_id",
+                    models.PositiveBigIntegerField(verbose_name="ID объекта"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("failed", "Ошибка"),
+                            ("done", "Завершено"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "step",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Шаг"
+                    ),
+                ),
+                (
+                    "deleted_rows",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Удалено строк"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Создано"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Обновлено"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Завершено"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Удаление",
+                "verbose_name_plural": "Удаления",
+                "ordering": ("id",),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="deletionjob",
+            constraint=models.UniqueConstraint(
+                fields=("target", "object_id"), name="unique_deletion_job"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def restart_unfinished(apps, schema_editor):
+    # В планы удаления добавлены шаги, сохраненный номер шага у
+    # незавершенных задач больше не соответствует плану. Пройденные шаги
+    # повторяются одним пустым запросом.
+    DeletionJob = apps.get_model("core", "DeletionJob")
+    DeletionJob.objects.exclude(status="done").update(step=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_deletionjob"),
+    ]
+
+    operations = [
+        migrations.RunPython(restart_unfinished, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,93 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """Slow queries aggregated by normalized SQL."""
+
+    fingerprint = models.CharField('Отпечаток', max_length=32, unique=True)
+    sql = models.TextField('Запрос')
+    example = models.TextField('Пример параметров', blank=True)
+    view = models.CharField('Представление', max_length=128, blank=True)
+    calls = models.PositiveIntegerField('Вызовов', default=0)
+    total_ms = models.FloatField('Общее время, мс', default=0)
+    max_ms = models.FloatField('Максимум, мс', default=0)
+    plan = models.TextField('План', blank=True)
+    plan_captured_at = models.DateTimeField(
+        'План получен', null=True, blank=True
+    )
+    first_seen = models.DateTimeField('Впервые', auto_now_add=True)
+    last_seen = models.DateTimeField('Последний раз', db_index=True)
+
+    class Meta:
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+        ordering = ('-total_ms',)
+
+    def __str__(self):
+        return self.sql[:80]
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.calls if self.calls else 0
+
+
+class PendingFileDeletion(models.Model):
+    """Media file waiting for the sweeper."""
+
+    name = models.CharField('Файл', max_length=255, unique=True)
+    created_at = models.DateTimeField('Добавлен', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Файл к удалению'
+        verbose_name_plural = 'Файлы к удалению'
+        ordering = ('id',)
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def record(cls, names):
+        cls.objects.bulk_create(
+            (cls(name=name) for name in names), ignore_conflicts=True
+        )
+
+
+class DeletionJob(models.Model):
+    """Hidden user or recipe deleted in batches by `process_deletions`."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    DONE = 'done'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+        (DONE, 'Завершено'),
+    )
+
+    target = models.CharField('Модель', max_length=64)
+    object_id = models.PositiveBigIntegerField('ID объекта')
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=PENDING
+    )
+    step = models.PositiveSmallIntegerField('Шаг', default=0)
+    deleted_rows = models.PositiveBigIntegerField('Удалено строк', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    updated_at = models.DateTimeField('Обновлено', auto_now=True)
+    finished_at = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Удаление'
+        verbose_name_plural = 'Удаления'
+        ordering = ('id',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['target', 'object_id'],
+                name='unique_deletion_job',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.target} #{self.object_id}'
@@ -0,0 +1,84 @@
+"""
+Query plan checks for the benchmark scenarios.
+
+Every SELECT issued by a scenario is explained with `EXPLAIN (FORMAT
+JSON)` and must not sequentially scan a large table, must stay under the
+row estimate bound, and the scenario must use its expected indexes.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .benchmark import request
+
+# Scenario -> index name prefixes its plans must use.
+EXPECTED_INDEXES = {
+    'recipe_list': ('recipe_created_idx',),
+    'recipe_feed': ('feed_author_created_idx',),
+    'ingredient_search': ('recipes_ingredient_name',),
+    'subscriptions': ('recipe_author_created_idx',),
+}
+
+
+def table_rows():
+    """Estimated row counts of the user tables."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, reltuples FROM pg_class "
+            "WHERE relkind = 'r' AND relnamespace = "
+            "'public'::regnamespace"
+        )
+        return dict(cursor.fetchall())
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+        return cursor.fetchone()[0][0]['Plan']
+
+
+def iter_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from iter_nodes(child)
+
+
+def is_checked(sql):
+    # COUNT(*) постраничной пагинации читает всю таблицу по определению.
+    return sql.startswith('SELECT') and not sql.startswith(
+        'SELECT COUNT(*) AS "__count"'
+    )
+
+
+def check_scenario(client, scenario, rows, min_rows, max_rows):
+    """Violations and used index names of one scenario."""
+    with CaptureQueriesContext(connection) as queries:
+        request(client, scenario)
+
+    violations = []
+    indexes = set()
+    for query in queries.captured_queries:
+        sql = query['sql']
+        if not is_checked(sql):
+            continue
+        plan = explain(sql)
+        if plan['Plan Rows'] > max_rows:
+            violations.append(
+                f'estimated {plan["Plan Rows"]} rows > {max_rows}: '
+                f'{sql[:200]}'
+            )
+        for node in iter_nodes(plan):
+            if 'Index Name' in node:
+                indexes.add(node['Index Name'])
+            table = node.get('Relation Name')
+            if node['Node Type'] == 'Seq Scan' and (
+                rows.get(table, 0) >= min_rows
+            ):
+                violations.append(
+                    f'seq scan on {table} '
+                    f'({int(rows[table])} rows): {sql[:200]}'
+                )
+
+    for prefix in EXPECTED_INDEXES.get(scenario.name, ()):
+        if not any(index.startswith(prefix) for index in indexes):
+            violations.append(f'index {prefix}* is not used')
+    return violations, indexes
@@ -0,0 +1,95 @@
+"""
+Sampling profiler for single requests.
+
+A background thread reads the request thread's stack through
+`sys._current_frames()` every `PROFILER_INTERVAL_MS` and counts
+identical stacks. The result is written as collapsed stacks (for
+flamegraph.pl and most flame graph tools) and as speedscope JSON.
+"""
+import json
+import os
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+
+def frame_name(code):
+    filename = code.co_filename
+    _, _, package_path = filename.rpartition('site-packages' + os.sep)
+    if not package_path:
+        package_path = os.path.relpath(filename, settings.BASE_DIR)
+    return f'{code.co_name} ({package_path}:{code.co_firstlineno})'
+
+
+class StackSampler(threading.Thread):
+    """Counts stacks of another thread until stopped."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def collapsed(samples):
+    return ''.join(
+        f'{";".join(stack)} {count}\n' for stack, count in samples.items()
+    )
+
+
+def speedscope(name, samples, interval_ms):
+    frames = {}
+    profile_samples = []
+    weights = []
+    for stack, count in samples.items():
+        profile_samples.append(
+            [frames.setdefault(frame, len(frames)) for frame in stack]
+        )
+        weights.append(count * interval_ms)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'foodgram',
+        'shared': {'frames': [{'name': frame} for frame in frames]},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': profile_samples,
+            'weights': weights,
+        }],
+    }
+
+
+def write_profile(profile_id, name, samples, interval_ms):
+    """Save both formats, return the directory."""
+    directory = Path(settings.PROFILER_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f'{profile_id}.collapsed').write_text(
+        collapsed(samples), encoding='utf-8'
+    )
+    (directory / f'{profile_id}.speedscope.json').write_text(
+        json.dumps(speedscope(name, samples, interval_ms)),
+        encoding='utf-8',
+    )
+    return directory
@@ -0,0 +1,208 @@
+"""
+Slow-query log.
+
+Queries slower than `SLOW_QUERY_MS` are queued by the request thread and
+aggregated by a background thread per worker into `SlowQuery` rows,
+keyed by the fingerprint of the normalized SQL. The thread drains the
+queue about once a second and writes each fingerprint once per drain.
+On PostgreSQL the thread also captures `EXPLAIN (ANALYZE, BUFFERS)` for
+SELECTs on its own connection: at most once per
+`SLOW_QUERY_EXPLAIN_INTERVAL` per fingerprint and
+`SLOW_QUERY_EXPLAINS_PER_MINUTE` per worker. Queries touching token and
+user tables are stored without parameters or plan.
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import threading
+from collections import deque
+from time import monotonic, sleep
+
+from django.conf import settings
+from django.db import (
+    IntegrityError, close_old_connections, connection, transaction,
+)
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+PARAMS_MAX_LEN = 2000
+DRAIN_DELAY = 1
+# Ключи токенов, хеши паролей и почта не попадают в админку.
+REDACTED_TABLES = ('authtoken_token', 'users_user')
+
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def normalize(sql):
+    """Literals and placeholder lists collapsed."""
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(sql):
+    return hashlib.md5(sql.encode()).hexdigest()
+
+
+def is_redacted(sql):
+    return any(table in sql for table in REDACTED_TABLES)
+
+
+def is_explainable(sql):
+    statement = sql.lstrip().upper()
+    return statement.startswith('SELECT') and 'FOR UPDATE' not in statement
+
+
+class SlowQueryLog:
+    """Per-worker queue and aggregation thread."""
+
+    def __init__(self, max_pending, explain_interval, explains_per_minute):
+        self.max_pending = max_pending
+        self.explain_interval = explain_interval
+        self.explains_per_minute = explains_per_minute
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._explained = {}
+        self._explain_times = deque()
+
+    def record(self, sql, params, many, duration_ms, view):
+        """Queue a slow query, never blocks."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start()
+        try:
+            self._queue.put_nowait((sql, params, many, duration_ms, view))
+        except queue.Full:
+            pass
+
+    def _start(self):
+        # Очередь и поток родителя не переживают fork.
+        self._pid = os.getpid()
+        self._queue = queue.Queue(self.max_pending)
+        threading.Thread(
+            target=self._run, name='slow-queries', daemon=True
+        ).start()
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            # Пауза собирает всплеск медленных запросов в один проход.
+            sleep(DRAIN_DELAY)
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.save(items)
+            except Exception:
+                logger.exception('Slow query log failed')
+            finally:
+                close_old_connections()
+
+    def save(self, items):
+        """Write the queued queries, one UPDATE per fingerprint."""
+        aggregated = {}
+        for sql, params, many, duration_ms, view in items:
+            normalized = normalize(sql)
+            key = fingerprint(normalized)
+            logger.warning(json.dumps({
+                'slow_query_ms': round(duration_ms, 2),
+                'view': view,
+                'fingerprint': key,
+                'sql': normalized,
+            }))
+            entry = aggregated.setdefault(key, {
+                'sql': normalized, 'calls': 0, 'total_ms': 0, 'max_ms': 0,
+            })
+            entry['calls'] += 1
+            entry['total_ms'] += duration_ms
+            entry['view'] = view
+            if duration_ms >= entry['max_ms']:
+                # Пример и план берутся у самого медленного вызова.
+                entry['max_ms'] = duration_ms
+                entry['query'] = (sql, params, many)
+
+        now = timezone.now()
+        for key, entry in aggregated.items():
+            self._write(key, entry, now)
+
+    def _write(self, key, entry, now):
+        sql, params, many = entry['query']
+        redacted = is_redacted(sql)
+        example = '' if redacted else repr(params)[:PARAMS_MAX_LEN]
+        fields = {
+            'calls': F('calls') + entry['calls'],
+            'total_ms': F('total_ms') + entry['total_ms'],
+            'max_ms': Greatest('max_ms', entry['max_ms']),
+            'last_seen': now,
+            'view': entry['view'],
+            'example': example,
+        }
+        if not SlowQuery.objects.filter(fingerprint=key).update(**fields):
+            try:
+                SlowQuery.objects.create(
+                    fingerprint=key,
+                    sql=entry['sql'],
+                    example=example,
+                    view=entry['view'],
+                    calls=entry['calls'],
+                    total_ms=entry['total_ms'],
+                    max_ms=entry['max_ms'],
+                    last_seen=now,
+                )
+            except IntegrityError:
+                SlowQuery.objects.filter(fingerprint=key).update(**fields)
+
+        # В плане видны значения параметров.
+        if not many and not redacted and self._may_explain(key, sql):
+            SlowQuery.objects.filter(fingerprint=key).update(
+                plan=self.explain(sql, params), plan_captured_at=now
+            )
+
+    def _may_explain(self, key, sql):
+        if connection.vendor != 'postgresql' or not is_explainable(sql):
+            return False
+        now = monotonic()
+        if now - self._explained.get(key, -self.explain_interval) < (
+            self.explain_interval
+        ):
+            return False
+        while self._explain_times and now - self._explain_times[0] > 60:
+            self._explain_times.popleft()
+        if len(self._explain_times) >= self.explains_per_minute:
+            return False
+        self._explained[key] = now
+        self._explain_times.append(now)
+        return True
+
+    @staticmethod
+    def explain(sql, params):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'SET LOCAL statement_timeout = %s',
+                [settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS],
+            )
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+slow_queries = SlowQueryLog(
+    settings.SLOW_QUERY_MAX_PENDING,
+    settings.SLOW_QUERY_EXPLAIN_INTERVAL,
+    settings.SLOW_QUERY_EXPLAINS_PER_MINUTE,
+)
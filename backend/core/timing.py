@@ -0,0 +1,121 @@
+"""
+Per-request SQL and timing instrumentation.
+
+Instrumented responses carry a `Server-Timing` header with the DB query
+count and time, view, serialize, render and total time. Sampled and slow
+requests are also logged as JSON. The switch lives in the shared cache (see
+the `server_timing` command) and falls back to the `SERVER_TIMING*`
+settings.
+"""
+from time import perf_counter
+
+from django.conf import settings
+
+from .budget import TRANSACTION_STATEMENTS
+from .cache import LRUCache, get_shared_cache
+
+SWITCH_KEY = 'core:server-timing'
+
+switch_cache = LRUCache(1, settings.SERVER_TIMING_SWITCH_TIMEOUT)
+
+
+def default_switch():
+    return {
+        'enabled': settings.SERVER_TIMING,
+        'sample_rate': settings.SERVER_TIMING_SAMPLE_RATE,
+        'slow_ms': settings.SERVER_TIMING_SLOW_MS,
+    }
+
+
+def get_switch():
+    """Current switch, re-read from the shared cache every few seconds."""
+    switch = switch_cache.get(SWITCH_KEY)
+    if switch is None:
+        cache = get_shared_cache()
+        switch = (cache and cache.get(SWITCH_KEY)) or default_switch()
+        switch_cache.set(SWITCH_KEY, switch)
+    return switch
+
+
+def set_switch(**values):
+    """Update the switch for all workers."""
+    cache = get_shared_cache()
+    if cache is None:
+        raise ValueError('Runtime switch needs a shared cache backend.')
+    switch = {**get_switch(), **values}
+    cache.set(SWITCH_KEY, switch, None)
+    switch_cache.clear()
+    return switch
+
+
+def reset_switch():
+    """Back to the settings."""
+    cache = get_shared_cache()
+    if cache is not None:
+        cache.delete(SWITCH_KEY)
+    switch_cache.clear()
+
+
+class RequestTimer:
+    """
+    Phase marks and SQL totals of one request.
+
+    Transaction control statements are timed but not counted, as in
+    `QueryLog`.
+    """
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.marks = {}
+        self.queries = 0
+        self.db = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """`connection.execute_wrapper` hook."""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not sql.startswith(TRANSACTION_STATEMENTS):
+                self.queries += 1
+            self.db += perf_counter() - started
+
+    def mark(self, name):
+        self.marks[name] = perf_counter()
+
+    def phases(self):
+        """Milliseconds per phase."""
+        end = self.marks.get('end', perf_counter())
+        phases = {
+            'total': end - self.started,
+            'db': self.db,
+        }
+        render = self.marks.get('render', end)
+        if 'view' in self.marks:
+            phases['view'] = (
+                self.marks.get('serialize', render) - self.marks['view']
+            )
+        if 'serialize' in self.marks:
+            phases['serialize'] = render - self.marks['serialize']
+        if 'rendered' in self.marks:
+            phases['render'] = self.marks['rendered'] - self.marks['render']
+        return {name: round(value * 1000, 2) for name, value in phases.items()}
+
+    def header(self, phases):
+        return ', '.join(
+            f'{name};dur={duration}'
+            + (f';desc="{self.queries} queries"' if name == 'db' else '')
+            for name, duration in phases.items()
+        )
+
+
+class SerializeTimingMixin:
+    """Marks the start of serialization on the request timer."""
+
+    def to_representation(self, instance):
+        # У вложенных сериализаторов и элементов списка отметка уже стоит.
+        request = self.context.get('request')
+        timer = getattr(request, 'timer', None)
+        if timer is not None and 'serialize' not in timer.marks:
+            timer.mark('serialize')
+        return super().to_representation(instance)
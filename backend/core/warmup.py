@@ -0,0 +1,89 @@
+"""
+Worker warm-up before the first request.
+
+`warm_up` needs no database: it fills the URL resolver, builds the fields
+of every API serializer (and with them the model `_meta` caches), loads
+the shopping list template and renders a PDF so fontTools, text shaping
+and the Montserrat files are loaded. Under `preload_app` gunicorn runs it
+once in the master and the workers inherit the result. `warm_up_worker`
+runs in every worker: it opens the database connection and reads the
+server timing switch, which is cached per process.
+"""
+import logging
+from time import perf_counter
+
+from django.db import connection
+from django.template.loader import get_template
+from django.urls import get_resolver
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+SERIALIZER_MODULES = ('api.', 'djoser.')
+
+
+def subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from subclasses(subclass)
+
+
+def warm_up_urls():
+    resolver = get_resolver()
+    # reverse_dict заполняет резолвер целиком, как первый запрос.
+    resolver.reverse_dict
+    return len(resolver.url_patterns)
+
+
+def warm_up_serializers():
+    # Модули сериализаторов импортируются вместе с представлениями.
+    warm_up_urls()
+    built = 0
+    for serializer_class in set(subclasses(BaseSerializer)):
+        if not serializer_class.__module__.startswith(SERIALIZER_MODULES):
+            continue
+        try:
+            serializer_class(context={}).fields
+        except Exception:
+            # Абстрактные и требующие аргументов сериализаторы пропускаются.
+            continue
+        built += 1
+    return built
+
+
+def warm_up_pdf():
+    from recipes.purchase_product import PDF
+
+    get_template('purchase_product.html')
+    return len(PDF().get_pdf('<p>Список покупок</p>'))
+
+
+def warm_up_reference_data():
+    from core.timing import get_switch
+
+    connection.ensure_connection()
+    return get_switch()
+
+
+def run(steps):
+    for step in steps:
+        started = perf_counter()
+        try:
+            result = step()
+        except Exception:
+            logger.exception('Warm-up step %s failed', step.__name__)
+            continue
+        logger.info(
+            'Warm-up step %s: %s in %.0f ms',
+            step.__name__, result, (perf_counter() - started) * 1000,
+        )
+
+
+def warm_up():
+    """Process-wide caches, no database access."""
+    run((warm_up_urls, warm_up_serializers, warm_up_pdf))
+
+
+def warm_up_worker():
+    """Per-worker connection and caches."""
+    run((warm_up_reference_data,))
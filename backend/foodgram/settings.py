@@ -29,14 +29,20 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'djoser',
     'django_filters',
+    'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
     'shortener.apps.ShortenerConfig',
-    'django_cleanup.apps.CleanupSelectedConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.ProfilerMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'shortener.middleware.ShortLinkMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,6 +83,29 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', 5432),
+        # Соединение переиспользуется запросами потока, 0 - новое на запрос
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', default='True'
+        ).lower() == 'true',
+        # За pgbouncer в режиме transaction: серверные курсоры живут
+        # дольше транзакции и ломаются при смене соединения.
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_PGBOUNCER', default='False'
+        ).lower() == 'true',
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+        },
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
@@ -128,13 +157,96 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
 }
 
+# Followed authors cache lifetime, seconds
+FOLLOWING_CACHE_TIMEOUT = int(os.getenv('FOLLOWING_CACHE_TIMEOUT', 300))
+
+# Followed authors feed
+# Authors with more followers are read on request instead of fanned out.
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', 10_000))
+# Recent recipes copied to the feed on subscribe.
+FEED_BACKFILL = int(os.getenv('FEED_BACKFILL', 50))
+FEED_BATCH_SIZE = int(os.getenv('FEED_BATCH_SIZE', 1000))
+
+# Short link redirects cache
+SHORT_LINK_CACHE_SIZE = int(os.getenv('SHORT_LINK_CACHE_SIZE', 10_000))
+SHORT_LINK_CACHE_TIMEOUT = int(os.getenv('SHORT_LINK_CACHE_TIMEOUT', 86_400))
+SHORT_LINK_LOCAL_TIMEOUT = int(os.getenv('SHORT_LINK_LOCAL_TIMEOUT', 600))
+# Unknown hashes
+SHORT_LINK_MISS_TIMEOUT = int(os.getenv('SHORT_LINK_MISS_TIMEOUT', 60))
+# Unused links without a recipe are removed by `compact_links`
+SHORT_LINK_EXPIRE_DAYS = int(os.getenv('SHORT_LINK_EXPIRE_DAYS', 180))
+
+# Short link clicks are flushed to the database in batches
+LINK_STATS_FLUSH_INTERVAL = int(os.getenv('LINK_STATS_FLUSH_INTERVAL', 10))
+LINK_STATS_MAX_PENDING = int(os.getenv('LINK_STATS_MAX_PENDING', 5000))
+
+# Token -> user snapshots, seconds
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10_000))
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', 300))
+# Workers drop their copies on this timeout only, keep it short.
+TOKEN_CACHE_LOCAL_TIMEOUT = int(os.getenv('TOKEN_CACHE_LOCAL_TIMEOUT', 10))
+
+# Server-Timing header and request timing logs,
+# switched at runtime by the `server_timing` command.
+SERVER_TIMING = os.getenv('SERVER_TIMING', default='False').lower() == 'true'
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', 0.01))
+SERVER_TIMING_SLOW_MS = int(os.getenv('SERVER_TIMING_SLOW_MS', 500))
+SERVER_TIMING_SWITCH_TIMEOUT = int(os.getenv('SERVER_TIMING_SWITCH_TIMEOUT', 5))
+
+# Bearer token required by /metrics, if set
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Staff requests with this token in the X-Profile header or the `profile`
+# query parameter are profiled, the profile id is in X-Profile-Id.
+PROFILER_TOKEN = os.getenv('PROFILER_TOKEN', '')
+PROFILER_DIR = os.getenv('PROFILER_DIR', BASE_DIR / 'profiles')
+PROFILER_INTERVAL_MS = int(os.getenv('PROFILER_INTERVAL_MS', 5))
+
+# Slow-query log, 0 disables it
+SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 200))
+SLOW_QUERY_MAX_PENDING = int(os.getenv('SLOW_QUERY_MAX_PENDING', 1000))
+# EXPLAIN ANALYZE re-runs the query, so plans are rate-limited:
+# per fingerprint, seconds
+SLOW_QUERY_EXPLAIN_INTERVAL = int(
+    os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', 3600)
+)
+# and per worker
+SLOW_QUERY_EXPLAINS_PER_MINUTE = int(
+    os.getenv('SLOW_QUERY_EXPLAINS_PER_MINUTE', 10)
+)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(
+    os.getenv('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', 5000)
+)
+
+# Views declare `query_budget`; over budget raises in strict mode and only
+# logs a warning and counts a metric otherwise
+QUERY_BUDGET_STRICT = os.getenv(
+    'QUERY_BUDGET_STRICT', default=str(DEBUG)
+).lower() == 'true'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
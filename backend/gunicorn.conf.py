@@ -0,0 +1,79 @@
+import gc
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+def cpu_count():
+    # Учитывает ограничение контейнера по ядрам (cpuset).
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', cpu_count() * 2 + 1))
+# При GUNICORN_THREADS > 1 gunicorn сам переключает sync на gthread.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+threaded = worker_class == 'gthread' or threads > 1
+# Приложение загружается в мастере один раз, воркеры делят его память
+# copy-on-write.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+# Перезапуск воркеров ограничивает рост памяти, разброс не дает им
+# перезапуститься одновременно. Перезапускаемый gthread-воркер закрывает
+# принятые, но еще не прочитанные соединения, поэтому для него перезапуск
+# по умолчанию выключен.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0 if threaded else 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Heartbeat-файлы воркеров в памяти, а не на overlay-диске контейнера.
+worker_tmp_dir = os.getenv(
+    'GUNICORN_WORKER_TMP_DIR',
+    '/dev/shm' if os.path.isdir('/dev/shm') else None,
+)
+warm_up = os.getenv('GUNICORN_WARM_UP', 'True').lower() == 'true'
+
+
+def on_starting(server):
+    """Drop the metric files of the previous run."""
+    path = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+
+def when_ready(server):
+    """Warm up the preloaded app once, before the workers are forked."""
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+
+    if warm_up:
+        from core.warmup import warm_up as warm_up_app
+
+        warm_up_app()
+    # Соединения мастера не должны достаться воркерам.
+    connections.close_all()
+    # Сборщик мусора не трогает объекты мастера, и их страницы остаются
+    # общими.
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """Warm up the worker before it accepts requests."""
+    if not warm_up:
+        return
+    from core import warmup
+
+    if not worker.cfg.preload_app:
+        warmup.warm_up()
+    warmup.warm_up_worker()
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
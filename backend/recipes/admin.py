@@ -1,7 +1,9 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.html import format_html
 
 from core.constants import INGR_MIN
+from core.deletion import schedule_deletion
 from .models import (
     FavoriteRecipe, Ingredient, Recipe,
     RecipeIngredient, ShoppingCart, Tag,
@@ -19,6 +21,11 @@ class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
     extra = 1
     min_num = INGR_MIN
+    # Выпадающий список всех ингредиентов загружался в каждой строке.
+    autocomplete_fields = ('ingredient',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('ingredient')
 
 
 @admin.register(Recipe)
@@ -27,10 +34,12 @@ class RecipeAdmin(admin.ModelAdmin):
 
     list_display = ('name', 'author')
     list_display_links = ('name', 'author')
+    list_select_related = ('author',)
+    autocomplete_fields = ('author',)
     search_fields = ('name', 'author__username')
     search_help_text = hlp_txt['search_rec_user']
     filter_horizontal = ('tags',)
-    list_filter = ('tags',)
+    list_filter = ('tags', 'is_hidden')
     readonly_fields = ('in_favorites',)
     inlines = [RecipeIngredientInline]
 
@@ -58,7 +67,19 @@ class RecipeAdmin(admin.ModelAdmin):
     )
     def in_favorites(self, obj):
         """Fav Recipes count"""
-        return obj.favorites.count()
+        return obj.favorites_count
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorites_count=Count('favorites')
+        )
+
+    def delete_model(self, request, obj):
+        schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            schedule_deletion(obj)
 
 
 @admin.register(Tag)
@@ -96,3 +117,4 @@ class AuthorRecipeAdmin(admin.ModelAdmin):
 
     list_display = ('id', '__str__')
     list_display_links = ('id', '__str__')
+    list_select_related = ('author', 'recipe')
@@ -0,0 +1,143 @@
+"""
+Followed authors feed.
+
+New recipes are copied into follower inboxes (`FeedRecipe`) by the
+`fan_out_feed --loop` worker, so reading the feed is a range scan over
+one user's rows. Recipes of authors with more than
+`FEED_FANOUT_LIMIT` followers are not fanned out. The recipe
+`feed_status` is the only source of truth: every followed recipe not yet
+fanned out, queued or skipped, is read directly on request and merged
+into the page.
+"""
+from heapq import merge
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from users.models import Subscriber
+from .models import FeedRecipe, Recipe
+
+
+def is_popular(author_id):
+    """Author followers exceed the fan-out limit."""
+    return (
+        Subscriber.objects.filter(author_id=author_id)
+        .order_by()[settings.FEED_FANOUT_LIMIT:]
+        .exists()
+    )
+
+
+def fan_out_recipe(recipe):
+    """Add a queued recipe to the inboxes of its author followers."""
+    with transaction.atomic():
+        if is_popular(recipe.author_id):
+            status = Recipe.FEED_SKIPPED
+        else:
+            follower_ids = (
+                Subscriber.objects.filter(author_id=recipe.author_id)
+                .values_list('user_id', flat=True)
+            )
+            FeedRecipe.objects.bulk_create(
+                (
+                    FeedRecipe(
+                        user_id=user_id,
+                        recipe_id=recipe.id,
+                        created_at=recipe.created_at,
+                    )
+                    for user_id in follower_ids.iterator(
+                        chunk_size=settings.FEED_BATCH_SIZE
+                    )
+                ),
+                batch_size=settings.FEED_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            status = Recipe.FEED_DONE
+        Recipe.objects.filter(pk=recipe.id).update(feed_status=status)
+
+
+def fan_out_pending(limit):
+    """Fan out up to `limit` queued recipes, oldest first."""
+    recipes = list(
+        Recipe.objects.visible()
+        .filter(feed_status=Recipe.FEED_PENDING)
+        .only('id', 'author_id', 'created_at')
+        .order_by('created_at')[:limit]
+    )
+    for recipe in recipes:
+        fan_out_recipe(recipe)
+    return len(recipes)
+
+
+def backfill(user_id, author_id):
+    """Copy recent author recipes, except skipped, to a new follower inbox."""
+    # Рецепты в очереди тоже копируются: рассылка могла прочитать
+    # подписчиков до этой подписки и отметить рецепт разосланным уже
+    # после. Повторы с прямым чтением убирает get_feed_page.
+    recipes = (
+        Recipe.objects.filter(author_id=author_id)
+        .exclude(feed_status=Recipe.FEED_SKIPPED)
+        .order_by('-created_at')
+        .values_list('id', 'created_at')[:settings.FEED_BACKFILL]
+    )
+    FeedRecipe.objects.bulk_create(
+        (
+            FeedRecipe(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                created_at=created_at,
+            )
+            for recipe_id, created_at in recipes
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    """Remove author recipes from a former follower inbox."""
+    FeedRecipe.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+
+
+def _before(position, id_field):
+    created_at, recipe_id = position
+    return Q(created_at__lt=created_at) | Q(
+        created_at=created_at, **{f'{id_field}__lt': recipe_id}
+    )
+
+
+def get_feed_page(user, position, limit):
+    """
+    :param position: (created_at, recipe_id) of the last seen recipe
+    :return: [(created_at, recipe_id), ...] newest first
+    """
+    entries = FeedRecipe.objects.filter(user=user)
+    if position is not None:
+        entries = entries.filter(_before(position, 'recipe_id'))
+    pages = [
+        entries.order_by('-created_at', '-recipe_id')
+        .values_list('created_at', 'recipe_id')[:limit]
+    ]
+
+    following_ids = Subscriber.get_following_ids(user)
+    if following_ids:
+        # Частичный индекс recipe_feed_direct_idx.
+        recipes = Recipe.objects.filter(
+            ~Q(feed_status=Recipe.FEED_DONE), author_id__in=following_ids
+        )
+        if position is not None:
+            recipes = recipes.filter(_before(position, 'id'))
+        pages.append(
+            recipes.order_by('-created_at', '-id')
+            .values_list('created_at', 'id')[:limit]
+        )
+
+    rows, seen = [], set()
+    for row in merge(*pages, reverse=True):
+        if len(rows) == limit:
+            break
+        if row[1] not in seen:
+            seen.add(row[1])
+            rows.append(row)
+    return rows
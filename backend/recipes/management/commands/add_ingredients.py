@@ -1,29 +1,218 @@
 import csv
+import io
+from time import monotonic
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import IntegrityError
+from django.db import connection, transaction
+
+from core.constants import INGR_MAX, INGR_NAME_MAX
+from recipes.management.readers import batched, read_rows
 from recipes.models import Ingredient
 
+STAGING_TABLE = 'ingredient_staging'
+
 
 class Command(BaseCommand):
-    """Ingredients csv loader"""
+    """Ingredients csv/json loader"""
+
+    help = (
+        'Load ingredients from a CSV (name,unit) or JSON file. '
+        'Existing ingredients are skipped, so the load can be repeated.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=settings.BASE_DIR / 'data/ingredients.csv',
+        )
+        parser.add_argument('--format', choices=('csv', 'json'))
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--update-units',
+            action='store_true',
+            help=(
+                'Change the unit of an ingredient with a single unit '
+                'when the file has another single unit for its name.'
+            ),
+        )
 
     def handle(self, *args, **options):
-        file_path = settings.BASE_DIR / 'data/ingredients.csv'
-        with open(file_path, 'r', encoding='utf-8',) as file:
-            try:
-                Ingredient.objects.bulk_create(
-                    Ingredient(
-                        name=row[0],
-                        measurement_unit=row[1]
-                    )
-                    for row in csv.reader(file)
+        started = monotonic()
+        rows = self.read(options['path'], options['format'])
+        if self.supports_copy():
+            counts = self.load_with_copy(rows, **options)
+        else:
+            counts = self.load_with_orm(rows, **options)
+
+        elapsed = monotonic() - started
+        total = sum(counts.values())
+        summary = ', '.join(
+            f'{name} {count}' for name, count in counts.items()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Ingredients applied: {summary} '
+                f'({total / elapsed:.0f} rows/s)'
+            )
+        )
+
+    def read(self, path, file_format):
+        return self.valid_rows(
+            read_rows(path, ('name', 'measurement_unit'), file_format)
+        )
+
+    def valid_rows(self, rows):
+        self.invalid = 0
+        for row in rows:
+            if (
+                len(row) != 2
+                or not row[0].strip()
+                or not row[1].strip()
+                or len(row[0]) > INGR_MAX
+                or len(row[1]) > INGR_NAME_MAX
+            ):
+                self.invalid += 1
+                continue
+            yield row[0].strip().lower(), row[1].strip()
+
+    @staticmethod
+    def supports_copy():
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            return hasattr(cursor.cursor, 'copy_expert')
+
+    def load_with_copy(self, rows, batch_size, update_units, **options):
+        """COPY into a temporary table and merge with one statement."""
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {STAGING_TABLE} '
+                f'(name varchar({INGR_MAX}), '
+                f'measurement_unit varchar({INGR_NAME_MAX})) '
+                f'ON COMMIT DROP'
+            )
+            for batch in batched(rows, batch_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.cursor.copy_expert(
+                    f'COPY {STAGING_TABLE} FROM STDIN WITH (FORMAT csv)',
+                    buffer,
                 )
-                self.stdout.write(
-                    self.style.SUCCESS('Ingredients applied')
+
+            updated = 0
+            if update_units:
+                cursor.execute(
+                    f'UPDATE {table} AS i '
+                    f'SET measurement_unit = s.measurement_unit '
+                    f'FROM ('
+                    f'  SELECT name, min(measurement_unit) AS measurement_unit'
+                    f'  FROM {STAGING_TABLE} GROUP BY name'
+                    f'  HAVING count(DISTINCT measurement_unit) = 1'
+                    f') AS s '
+                    f'WHERE i.name = s.name '
+                    f'AND i.measurement_unit <> s.measurement_unit '
+                    f'AND NOT EXISTS ('
+                    f'  SELECT 1 FROM {table} AS j'
+                    f'  WHERE j.name = i.name AND j.id <> i.id'
+                    f')'
                 )
-            except IntegrityError:
-                self.stdout.write(
-                    self.style.ERROR('Ingredients exists')
+                updated = cursor.rowcount
+
+            cursor.execute(
+                f'WITH inserted AS ('
+                f'  INSERT INTO {table} (name, measurement_unit)'
+                f'  SELECT DISTINCT name, measurement_unit'
+                f'  FROM {STAGING_TABLE}'
+                f'  ON CONFLICT (name, measurement_unit) DO NOTHING'
+                f'  RETURNING 1'
+                f') '
+                f'SELECT '
+                f'  (SELECT count(*) FROM inserted),'
+                f'  (SELECT count(*) FROM {STAGING_TABLE})'
+            )
+            inserted, loaded = cursor.fetchone()
+
+        return {
+            'inserted': inserted,
+            'updated': updated,
+            'skipped': loaded - inserted - updated + self.invalid,
+        }
+
+    def load_with_orm(self, rows, batch_size, update_units, **options):
+        """Batched bulk_create for databases without COPY."""
+        attempted = updated = skipped = 0
+        if update_units:
+            # Единицы имени собираются по всему файлу, как GROUP BY в COPY.
+            units = self.file_units(
+                self.read(options['path'], options['format'])
+            )
+        with transaction.atomic():
+            # ignore_conflicts не сообщает, какие строки пропущены.
+            before = Ingredient.objects.count()
+            for batch in batched(rows, batch_size):
+                batch = set(batch)
+                stored = {}
+                for ingredient in Ingredient.objects.filter(
+                    name__in={name for name, _ in batch}
+                ):
+                    stored.setdefault(ingredient.name, []).append(ingredient)
+
+                new = {
+                    (name, unit) for name, unit in batch
+                    if unit not in {
+                        ingredient.measurement_unit
+                        for ingredient in stored.get(name, ())
+                    }
+                }
+                skipped += len(batch) - len(new)
+
+                if update_units:
+                    changed = self.change_units(new, stored, units)
+                    new = {row for row in new if row[0] not in changed}
+                    Ingredient.objects.bulk_update(
+                        changed.values(), ['measurement_unit']
+                    )
+                    updated += len(changed)
+
+                Ingredient.objects.bulk_create(
+                    (
+                        Ingredient(name=name, measurement_unit=unit)
+                        for name, unit in new
+                    ),
+                    ignore_conflicts=True,
                 )
+                attempted += len(new)
+            inserted = Ingredient.objects.count() - before
+
+        return {
+            'inserted': inserted,
+            'updated': updated,
+            'skipped': skipped + attempted - inserted + self.invalid,
+        }
+
+    @staticmethod
+    def file_units(rows):
+        """:return: {name: set of units} over the whole file"""
+        units = {}
+        for name, unit in rows:
+            units.setdefault(name, set()).add(unit)
+        return units
+
+    @staticmethod
+    def change_units(new, stored, units):
+        """
+        :return: {name: ingredient with the new unit} for names having
+            a single unit both in the file and in the database
+        """
+        changed = {}
+        for name in {name for name, _ in new}:
+            ingredients = stored.get(name, ())
+            if len(units[name]) == 1 and len(ingredients) == 1:
+                ingredient = ingredients[0]
+                (ingredient.measurement_unit,) = units[name]
+                changed[name] = ingredient
+        return changed
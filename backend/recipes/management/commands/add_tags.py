@@ -1,30 +1,75 @@
-import csv
-
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.db.models import Q
+
+from core.constants import TAG_MAX
+from recipes.management.readers import read_rows
 from recipes.models import Tag
 
 
 class Command(BaseCommand):
-    """"Tags csv loader"""
+    """"Tags csv/json loader"""
+
+    help = (
+        'Load tags from a CSV (name,slug) or JSON file. Tags are matched '
+        'by slug, changed names are updated.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=settings.BASE_DIR / 'data/tags.csv',
+        )
+        parser.add_argument('--format', choices=('csv', 'json'))
+
     def handle(self, *args, **options):
-        file_path = settings.BASE_DIR / 'data/tags.csv'
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for row in csv.reader(f):
-                if Tag.objects.filter(
-                    Q(name=row[0]) | Q(slug=row[1])
-                ).exists():
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f'{row[0]!r} exist!'
-                        )
-                    )
-                    continue
-                Tag.objects.create(
-                    name=row[0],
-                    slug=row[1]
-                )
+        rows = {}
+        skipped = 0
+        for row in read_rows(
+            options['path'], ('name', 'slug'), options['format']
+        ):
+            if len(row) != 2 or not all(row) or max(map(len, row)) > TAG_MAX:
+                skipped += 1
+                continue
+            name, slug = row
+            rows[slug] = name
+
+        stored = Tag.objects.filter(
+            Q(slug__in=rows) | Q(name__in=rows.values())
+        )
+        by_slug = {tag.slug: tag for tag in stored}
+        taken_names = {tag.name: tag.slug for tag in stored}
+
+        new, changed = [], []
+        for slug, name in rows.items():
+            if taken_names.get(name, slug) != slug:
                 self.stdout.write(
-                    self.style.SUCCESS(f'Add: {row[0]!r}')
+                    self.style.ERROR(f'{name!r} exist!')
                 )
+                skipped += 1
+                continue
+            if slug not in by_slug:
+                new.append(Tag(name=name, slug=slug))
+            elif by_slug[slug].name != name:
+                by_slug[slug].name = name
+                changed.append(by_slug[slug])
+            else:
+                skipped += 1
+            taken_names[name] = slug
+
+        with transaction.atomic():
+            # Теги, добавленные после чтения, пропускаются.
+            before = Tag.objects.count()
+            Tag.objects.bulk_create(new, ignore_conflicts=True)
+            inserted = Tag.objects.count() - before
+            Tag.objects.bulk_update(changed, ['name'])
+        skipped += len(new) - inserted
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Tags applied: inserted {inserted}, '
+                f'updated {len(changed)}, skipped {skipped}'
+            )
+        )
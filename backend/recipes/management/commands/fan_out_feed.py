@@ -0,0 +1,54 @@
+import logging
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipes.feed import fan_out_pending
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Fan out new recipes to the feeds of their author followers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Recipes fanned out per query.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new recipes.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2,
+            help='Seconds between polls with --loop.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.fan_out(options['batch_size'])
+            if not options['loop']:
+                return
+            close_old_connections()
+            sleep(options['interval'])
+
+    def fan_out(self, batch_size):
+        total = 0
+        while True:
+            try:
+                count = fan_out_pending(batch_size)
+            except Exception:
+                logger.exception('Feed fan-out failed')
+                return
+            total += count
+            if count < batch_size:
+                break
+        if total:
+            self.stdout.write(f'Fanned out {total} recipes')
@@ -0,0 +1,336 @@
+import io
+import random
+from datetime import timedelta
+from itertools import accumulate
+from time import monotonic
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from core.constants import MAX_HASH, MAX_HASH_LEN, MIN_HASH, RECIPE_URL
+from recipes.management.readers import batched
+from recipes.models import (
+    FavoriteRecipe, FeedRecipe, Ingredient, Recipe,
+    RecipeIngredient, ShoppingCart, Tag,
+)
+from shortener.models import (
+    HASH_CHARS, LinkMapped, canonical_url, url_hash_chars,
+)
+from users.models import Subscriber
+
+User = get_user_model()
+
+PASSWORD = 'seed-password'
+IMAGES_DIR = 'recipes/seed'
+IMAGE_COLORS = (
+    (127, 84, 178), (230, 126, 34), (46, 204, 113), (52, 152, 219),
+    (231, 76, 60), (241, 196, 15), (26, 188, 156), (149, 165, 166),
+)
+
+
+def zipf_weights(size, exponent):
+    """Cumulative power-law weights: the first items are the most popular."""
+    return list(
+        accumulate(1 / rank ** exponent for rank in range(1, size + 1))
+    )
+
+
+class Command(BaseCommand):
+    """Synthetic dataset generator"""
+
+    help = (
+        'Generate users, recipes, favorites, shopping carts, '
+        'subscriptions and short links for load testing. '
+        'Tags and ingredients must be loaded first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10_000)
+        parser.add_argument('--favorites', type=int, default=50_000)
+        parser.add_argument('--carts', type=int, default=20_000)
+        parser.add_argument('--subscriptions', type=int, default=20_000)
+        parser.add_argument(
+            '--links',
+            type=int,
+            default=10_000,
+            help='Non-canonical short links, besides one per recipe.',
+        )
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.now = timezone.now()
+
+        self.tag_ids = list(Tag.objects.values_list('id', flat=True))
+        self.ingredient_ids = list(
+            Ingredient.objects.values_list('id', flat=True)
+        )
+        if not self.tag_ids or not self.ingredient_ids:
+            raise CommandError('Run add_tags and add_ingredients first.')
+        if User.objects.filter(
+            username__startswith=f'{self.prefix}_'
+        ).exists():
+            raise CommandError(
+                f'Users with prefix {self.prefix!r} exist, pass --prefix.'
+            )
+
+        # Идентификаторы перемешаны, чтобы популярность не зависела от id.
+        self.rng.shuffle(self.ingredient_ids)
+
+        self.step('images', self.create_images)
+        self.step('users', self.create_users, options['users'])
+        self.step('recipes', self.create_recipes, options['recipes'])
+        self.step(
+            'subscriptions',
+            self.create_subscriptions,
+            options['subscriptions'],
+        )
+        self.step(
+            'favorites',
+            self.create_author_recipes,
+            FavoriteRecipe,
+            options['favorites'],
+        )
+        self.step(
+            'carts',
+            self.create_author_recipes,
+            ShoppingCart,
+            options['carts'],
+        )
+        self.step('feed', self.create_feed)
+        self.step('links', self.create_links, options['links'])
+
+    def step(self, name, method, *args):
+        started = monotonic()
+        with transaction.atomic():
+            count = method(*args)
+        elapsed = monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{name}: {count} rows in {elapsed:.1f}s '
+                f'({count / max(elapsed, 1e-6):.0f} rows/s)'
+            )
+        )
+
+    def bulk_create(self, model, objs, **kwargs):
+        count = 0
+        for batch in batched(objs, self.batch_size):
+            model.objects.bulk_create(batch, **kwargs)
+            count += len(batch)
+        return count
+
+    def create_images(self):
+        self.images = []
+        for index, color in enumerate(IMAGE_COLORS):
+            name = f'{IMAGES_DIR}/placeholder_{index}.png'
+            if not default_storage.exists(name):
+                buffer = io.BytesIO()
+                Image.new('RGB', (64, 64), color).save(buffer, 'PNG')
+                name = default_storage.save(
+                    name, ContentFile(buffer.getvalue())
+                )
+            self.images.append(name)
+        return len(self.images)
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        users = (
+            User(
+                username=f'{self.prefix}_{index}',
+                email=f'{self.prefix}_{index}@example.com',
+                first_name=f'Имя{index}',
+                last_name=f'Фамилия{index}',
+                password=password,
+            )
+            for index in range(count)
+        )
+        self.bulk_create(User, users)
+        self.user_ids = list(
+            User.objects.filter(username__startswith=f'{self.prefix}_')
+            .order_by('id').values_list('id', flat=True)
+        )
+        # Популярные авторы и подписчики: степенное распределение.
+        self.user_weights = zipf_weights(len(self.user_ids), 1.1)
+        return len(self.user_ids)
+
+    def create_recipes(self, count):
+        author_ids = self.rng.choices(
+            self.user_ids, cum_weights=self.user_weights, k=count
+        )
+        recipes = (
+            Recipe(
+                author_id=author_id,
+                name=f'Рецепт {index}',
+                text='Описание рецепта. ' * self.rng.randint(1, 20),
+                cooking_time=self.rng.randint(5, 180),
+                image=self.rng.choice(self.images),
+            )
+            for index, author_id in enumerate(author_ids)
+        )
+        self.recipes = {}
+        for batch in batched(recipes, self.batch_size):
+            for recipe in Recipe.objects.bulk_create(batch):
+                self.recipes[recipe.id] = recipe.author_id
+
+        tag_weights = zipf_weights(len(self.tag_ids), 1)
+        tags = (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in self.recipes
+            for tag_id in set(
+                self.rng.choices(
+                    self.tag_ids,
+                    cum_weights=tag_weights,
+                    k=self.rng.randint(1, 3),
+                )
+            )
+        )
+        ingredient_weights = zipf_weights(len(self.ingredient_ids), 0.8)
+        ingredients = (
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=self.rng.randint(1, 500),
+            )
+            for recipe_id in self.recipes
+            for ingredient_id in set(
+                self.rng.choices(
+                    self.ingredient_ids,
+                    cum_weights=ingredient_weights,
+                    k=self.rng.randint(3, 15),
+                )
+            )
+        )
+        return (
+            len(self.recipes)
+            + self.bulk_create(Recipe.tags.through, tags)
+            + self.bulk_create(RecipeIngredient, ingredients)
+        )
+
+    def random_pairs(self, count, left, right, right_weights=None):
+        """Unique (left, right) pairs, right items power-law distributed."""
+        pairs = set()
+        attempts = count * 3
+        while len(pairs) < count and attempts:
+            attempts -= 1
+            pair = (
+                self.rng.choice(left),
+                self.rng.choices(right, cum_weights=right_weights)[0],
+            )
+            if pair[0] != pair[1]:
+                pairs.add(pair)
+        return sorted(pairs)
+
+    def create_subscriptions(self, count):
+        self.subscriptions = self.random_pairs(
+            count, self.user_ids, self.user_ids, self.user_weights
+        )
+        return self.bulk_create(
+            Subscriber,
+            (
+                Subscriber(user_id=user_id, author_id=author_id)
+                for user_id, author_id in self.subscriptions
+            ),
+        )
+
+    def create_author_recipes(self, model, count):
+        recipe_ids = list(self.recipes)
+        pairs = self.random_pairs(
+            count,
+            self.user_ids,
+            recipe_ids,
+            zipf_weights(len(recipe_ids), 0.9),
+        )
+        return self.bulk_create(
+            model,
+            (
+                model(author_id=user_id, recipe_id=recipe_id)
+                for user_id, recipe_id in pairs
+            ),
+        )
+
+    def create_feed(self):
+        """Inboxes the recipe and subscription signals would have filled."""
+        followers = {}
+        for user_id, author_id in self.subscriptions:
+            followers.setdefault(author_id, []).append(user_id)
+        popular_ids = {
+            author_id for author_id, user_ids in followers.items()
+            if len(user_ids) > settings.FEED_FANOUT_LIMIT
+        }
+        recipes = Recipe.objects.filter(id__in=self.recipes)
+        recipes.exclude(author_id__in=popular_ids).update(
+            feed_status=Recipe.FEED_DONE
+        )
+        recipes.filter(author_id__in=popular_ids).update(
+            feed_status=Recipe.FEED_SKIPPED
+        )
+        created = dict(recipes.values_list('id', 'created_at'))
+        entries = (
+            FeedRecipe(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                created_at=created[recipe_id],
+            )
+            for recipe_id, author_id in self.recipes.items()
+            if author_id not in popular_ids
+            for user_id in followers.get(author_id, ())
+        )
+        return self.bulk_create(FeedRecipe, entries, ignore_conflicts=True)
+
+    def create_links(self, count):
+        """Canonical recipe links and stale links to compact."""
+        used = set(LinkMapped.objects.values_list('url_hash', flat=True))
+
+        def link(url, **fields):
+            original_url = canonical_url(url)
+            chars = url_hash_chars(original_url)
+            # Как в LinkMapped.get_or_create_for_url: свободный префикс
+            # не длиннее MAX_HASH_LEN, иначе случайный хеш.
+            url_hash = next(
+                (
+                    chars[:length]
+                    for length in range(MIN_HASH, MAX_HASH_LEN + 1)
+                    if chars[:length] not in used
+                ),
+                None,
+            )
+            while url_hash is None or url_hash in used:
+                url_hash = ''.join(
+                    self.rng.choice(HASH_CHARS) for _ in range(MAX_HASH)
+                )
+            used.add(url_hash)
+            return LinkMapped(
+                url_hash=url_hash, original_url=original_url, **fields
+            )
+
+        links = [
+            link(RECIPE_URL.format(recipe_id), recipe_id=recipe_id)
+            for recipe_id in self.recipes
+        ]
+        links += [
+            # canonical_url отбрасывает query, поэтому старые ссылки
+            # различаются путем.
+            link(
+                f'https://example.com/old/{index}'
+                f'{RECIPE_URL.format(recipe_id)}',
+                last_accessed=(
+                    self.now - timedelta(days=self.rng.randint(0, 365))
+                ).date(),
+            )
+            for index, recipe_id in enumerate(
+                self.rng.choices(list(self.recipes), k=count)
+            )
+        ]
+        return self.bulk_create(LinkMapped, links, ignore_conflicts=True)
@@ -0,0 +1,65 @@
+"""Streaming row readers for the reference data loaders."""
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import CommandError
+
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+def read_rows(path, fields, file_format=None):
+    """
+    Yield tuples of `fields` from a CSV or a JSON array file.
+
+    CSV columns go in `fields` order; JSON items are objects with
+    `fields` keys. Files are read lazily, memory use does not depend on
+    the file size.
+    """
+    path = Path(path)
+    file_format = file_format or path.suffix.lstrip('.').lower()
+    if file_format not in ('csv', 'json'):
+        raise CommandError(f'Unknown file format: {file_format!r}')
+
+    with open(path, 'r', encoding='utf-8') as file:
+        if file_format == 'csv':
+            for row in csv.reader(file):
+                yield tuple(row[:len(fields)])
+        else:
+            for item in iter_json_array(file):
+                try:
+                    yield tuple(item[field] for field in fields)
+                except (KeyError, TypeError):
+                    yield ()
+
+
+def iter_json_array(file, chunk_size=JSON_CHUNK_SIZE):
+    """Decode items of a top-level JSON array one by one."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('JSON file must contain an array.')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip()
+        if buffer.startswith(','):
+            buffer = buffer[1:].lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise CommandError('Unexpected end of JSON file.')
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.11 on 2026-10-19 14:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0005_alter_recipe_cooking_time_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(
+                fields=['author', '-created_at'],
+                name='recipe_author_created_idx',
+            ),
+        ),
+        migrations.CreateModel(
+            name='FeedRecipe',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'created_at',
+                    models.DateTimeField(verbose_name='Опубликовано'),
+                ),
+                (
+                    'author',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Автор',
+                    ),
+                ),
+                (
+                    'recipe',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='recipes.recipe',
+                        verbose_name='Рецепт',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Лента',
+                'verbose_name_plural': 'Лента',
+                'default_related_name': 'feed',
+                'indexes': [
+                    models.Index(
+                        fields=['author', '-created_at', '-recipe'],
+                        name='feed_author_created_idx',
+                    )
+                ],
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('author', 'recipe'),
+                        name='unique recipe feed',
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:17
+
+from django.db import migrations, models
+
+import recipes.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0006_feedrecipe'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredient',
+            name='name',
+            field=recipes.models.LowerField(
+                db_index=True, max_length=128, verbose_name='Название'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(
+                fields=['-created_at'], name='recipe_created_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0007_recipe_created_idx_ingredient_name_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='is_hidden',
+            field=models.BooleanField(
+                default=False,
+                help_text='Рецепт ожидает удаления',
+                verbose_name='Скрыт',
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def set_feed_status(apps, schema_editor):
+    # Рецепты до миграции уже разосланы, кроме рецептов популярных
+    # авторов: их лента читала напрямую.
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Subscriber = apps.get_model('users', 'Subscriber')
+    popular_ids = (
+        Subscriber.objects.values('author_id')
+        .annotate(followers=Count('id'))
+        .filter(followers__gt=settings.FEED_FANOUT_LIMIT)
+        .values('author_id')
+    )
+    Recipe.objects.update(feed_status='done')
+    Recipe.objects.filter(author_id__in=popular_ids).update(
+        feed_status='skipped'
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0008_recipe_is_hidden'),
+        ('users', '0008_user_is_hidden'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='feed_status',
+            field=models.CharField(
+                choices=[
+                    ('pending', 'В очереди'),
+                    ('done', 'Разослан'),
+                    ('skipped', 'Читается из ленты напрямую'),
+                ],
+                default='pending',
+                help_text='Пока рецепт не разослан подписчикам, лента '
+                          'читает его напрямую',
+                max_length=16,
+                verbose_name='Рассылка в ленты',
+            ),
+        ),
+        migrations.RunPython(set_feed_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(
+                condition=models.Q(('feed_status', 'done'), _negated=True),
+                fields=['author', '-created_at', '-id'],
+                name='recipe_feed_direct_idx',
+            ),
+        ),
+    ]
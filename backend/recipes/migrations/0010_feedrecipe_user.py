@@ -0,0 +1,49 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0009_recipe_feed_status'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='feedrecipe',
+            name='unique recipe feed',
+        ),
+        migrations.RemoveIndex(
+            model_name='feedrecipe',
+            name='feed_author_created_idx',
+        ),
+        migrations.RenameField(
+            model_name='feedrecipe',
+            old_name='author',
+            new_name='user',
+        ),
+        migrations.AlterField(
+            model_name='feedrecipe',
+            name='user',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+                verbose_name='Подписчик',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='feedrecipe',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique recipe feed',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='feedrecipe',
+            index=models.Index(
+                fields=['user', '-created_at', '-recipe'],
+                name='feed_user_created_idx',
+            ),
+        ),
+    ]
@@ -1,6 +1,6 @@
+from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django_cleanup.cleanup import cleanup_select
 
 from core import abstract_models
 from core.constants import (
@@ -8,6 +8,7 @@ from core.constants import (
     MIN_COOKING_TM, REC_NAME_MAX, TAG_MAX,
     VALUE_MAX,
 )
+from core.files import track_files
 
 
 class Tag(models.Model):
@@ -69,10 +70,26 @@ class Ingredient(models.Model):
         return f'{self.name} ({self.measurement_unit})'
 
 
-@cleanup_select
+class RecipeQuerySet(models.QuerySet):
+
+    def visible(self):
+        """Without hidden recipes and recipes of hidden authors."""
+        return self.filter(is_hidden=False, author__is_hidden=False)
+
+
+@track_files
 class Recipe(abstract_models.AuthorCreatedModel):
     """Recipe model"""
 
+    FEED_PENDING = 'pending'
+    FEED_DONE = 'done'
+    FEED_SKIPPED = 'skipped'
+    FEED_STATUSES = (
+        (FEED_PENDING, 'В очереди'),
+        (FEED_DONE, 'Разослан'),
+        (FEED_SKIPPED, 'Читается из ленты напрямую'),
+    )
+
     image = models.ImageField(
         'Картинка',
         upload_to='recipes/'
@@ -104,12 +121,42 @@ class Recipe(abstract_models.AuthorCreatedModel):
         verbose_name='Ингредиенты',
         through='RecipeIngredient'
     )
+    is_hidden = models.BooleanField(
+        'Скрыт',
+        default=False,
+        help_text='Рецепт ожидает удаления',
+    )
+    feed_status = models.CharField(
+        'Рассылка в ленты',
+        max_length=16,
+        choices=FEED_STATUSES,
+        default=FEED_PENDING,
+        help_text='Пока рецепт не разослан подписчикам, лента читает его '
+                  'напрямую',
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ('-created_at',)
         default_related_name = 'recipes'
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['-created_at'],
+                name='recipe_created_idx',
+            ),
+            models.Index(
+                fields=['author', '-created_at'],
+                name='recipe_author_created_idx',
+            ),
+            models.Index(
+                fields=['author', '-created_at', '-id'],
+                name='recipe_feed_direct_idx',
+                condition=~models.Q(feed_status='done'),
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -170,7 +217,9 @@ class RecipeIngredient(models.Model):
 
         return (
             cls.objects.filter(
-                models.Q(recipe__in=user.shopping_cart.values('recipe'))
+                models.Q(recipe__in=user.shopping_cart.values('recipe')),
+                recipe__is_hidden=False,
+                recipe__author__is_hidden=False,
             )
             .values(name=models.F('ingredient__name'))
             .annotate(
@@ -181,7 +230,9 @@ class RecipeIngredient(models.Model):
         )
 
 
-class FavoriteRecipe(abstract_models.AuthorRecipeModel):
+class FavoriteRecipe(
+    abstract_models.RecipeListMixin, abstract_models.AuthorRecipeModel
+):
     """Fav recipes model"""
 
     class Meta:
@@ -199,7 +250,9 @@ class FavoriteRecipe(abstract_models.AuthorRecipeModel):
         return f'{self.recipe.name!r} в избранном у {self.author.username!r}'
 
 
-class ShoppingCart(abstract_models.AuthorRecipeModel):
+class ShoppingCart(
+    abstract_models.RecipeListMixin, abstract_models.AuthorRecipeModel
+):
     """Shoppingcart model."""
 
     class Meta:
@@ -215,3 +268,39 @@ class ShoppingCart(abstract_models.AuthorRecipeModel):
 
     def __str__(self):
         return f'{self.recipe.name!r} в корзине {self.author.username!r}'
+
+
+class FeedRecipe(models.Model):
+    """Followed authors recipes inbox."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт'
+    )
+    created_at = models.DateTimeField('Опубликовано')
+
+    class Meta:
+        default_related_name = 'feed'
+        verbose_name = 'Лента'
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique recipe feed'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at', '-recipe'],
+                name='feed_user_created_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe.name!r} в ленте {self.user.username!r}'
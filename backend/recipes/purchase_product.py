@@ -3,6 +3,8 @@ import os
 from django.shortcuts import render
 from fpdf import FPDF
 
+from core.metrics import PDF_DURATION
+
 from recipes.constants import (
     NONE_MONTSERRAT_SIZE, B_MONTSERRAT_SIZE, I_MONTSERRAT_SIZE,
     CL_SET_FILL, CL_TXT, REC_PARAMS, CEL_PARAMS, IMAGE_PARAMS,
@@ -88,6 +90,7 @@ class PDF(FPDF):
         return self.output()
 
 
+@PDF_DURATION.time()
 def generate_pdf_file(ingredients, recipes, request):
     html = render(
         request,
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import Subscriber
+from . import feed
+
+
+@receiver(post_save, sender=Subscriber)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        user_id, author_id = instance.user_id, instance.author_id
+        transaction.on_commit(lambda: feed.backfill(user_id, author_id))
+
+
+@receiver(post_delete, sender=Subscriber)
+def prune_feed(sender, instance, **kwargs):
+    feed.prune(instance.user_id, instance.author_id)
@@ -0,0 +1,99 @@
+"""
+Write-behind click counters.
+
+Clicks are aggregated in memory per worker and flushed to `LinkStats` by
+a background thread every `LINK_STATS_FLUSH_INTERVAL` seconds, or sooner
+when `LINK_STATS_MAX_PENDING` counters pile up. A crashed worker loses at
+most one interval of clicks; a graceful exit flushes what is left. While
+the database is unavailable counters are kept up to the same limit and
+retried every interval; clicks beyond it are dropped and logged.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import LinkStats
+
+logger = logging.getLogger(__name__)
+
+
+class ClickCounter:
+    """Per-worker click aggregation."""
+
+    def __init__(self, interval, max_pending):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._failing = False
+        self._pid = None
+
+    def record(self, link_id):
+        """Count a click, no I/O."""
+        key = (link_id, timezone.now().date())
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start()
+            self._counts[key] += 1
+            pending = len(self._counts)
+        # После неудачной записи повтор ждет интервала.
+        if pending >= self.max_pending and not self._failing:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+        try:
+            LinkStats.add_clicks(counts)
+        except Exception:
+            logger.exception('Link stats flush failed')
+            self._failing = True
+            self._retain(counts)
+        else:
+            self._failing = False
+        finally:
+            close_old_connections()
+
+    def _retain(self, counts):
+        """Merge unsaved counts back, up to `max_pending` counters."""
+        dropped = 0
+        with self._lock:
+            for key, count in counts.items():
+                if key in self._counts or len(self._counts) < self.max_pending:
+                    self._counts[key] += count
+                else:
+                    dropped += count
+        if dropped:
+            logger.warning(
+                'Link stats: %s clicks dropped, pending limit reached',
+                dropped,
+            )
+
+    def _start(self):
+        # Счетчики и поток родителя не переживают fork.
+        self._pid = os.getpid()
+        self._counts.clear()
+        threading.Thread(
+            target=self._run, name='link-stats', daemon=True
+        ).start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+clicks = ClickCounter(
+    settings.LINK_STATS_FLUSH_INTERVAL, settings.LINK_STATS_MAX_PENDING
+)
+atexit.register(clicks.flush)
@@ -5,3 +5,6 @@ class ShortenerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shortener'
     verbose_name = 'Сопоставленные ссылки'
+
+    def ready(self):
+        from . import signals  # noqa: F401
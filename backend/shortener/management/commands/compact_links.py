@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from shortener.models import LinkMapped
+
+
+class Command(BaseCommand):
+    """Expire unused non-canonical short links"""
+
+    help = (
+        'Delete short links not tied to a recipe and not followed '
+        'for --days days, in batches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SHORT_LINK_EXPIRE_DAYS
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--vacuum',
+            action='store_true',
+            help='VACUUM ANALYZE the links table afterwards (PostgreSQL).',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = LinkMapped.objects.filter(
+            Q(last_accessed__lt=cutoff.date())
+            | Q(last_accessed__isnull=True, created_at__lt=cutoff),
+            recipe__isnull=True,
+        ).order_by('id')
+
+        if options['dry_run']:
+            self.stdout.write(f'Expired links: {expired.count()}')
+            return
+
+        deleted = 0
+        while True:
+            ids = list(
+                expired.values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            LinkMapped.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            self.stdout.write(f'Deleted: {deleted}')
+
+        if options['vacuum'] and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'VACUUM ANALYZE '
+                    + connection.ops.quote_name(LinkMapped._meta.db_table)
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Expired links removed: {deleted}')
+        )
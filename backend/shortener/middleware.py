@@ -0,0 +1,42 @@
+from django.http import HttpResponseRedirect
+from django.urls import Resolver404, resolve
+
+from .analytics import clicks
+from .resolver import get_link
+from .urls import app_name
+
+
+class ShortLinkMiddleware:
+    """
+    Redirect known short links before the rest of the middleware stack.
+
+    Sessions, auth, CSRF and messages are not needed for a redirect;
+    anything else falls through to `views.load_url`.
+    """
+
+    prefix = '/s/'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            request.method == 'GET'
+            and request.path_info.startswith(self.prefix)
+        ):
+            link = self._get_link(request.path_info)
+            if link is not None:
+                link_id, original_url = link
+                clicks.record(link_id)
+                return HttpResponseRedirect(original_url)
+        return self.get_response(request)
+
+    @staticmethod
+    def _get_link(path):
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return None
+        if match.namespace != app_name:
+            return None
+        return get_link(match.kwargs['url_hash'])
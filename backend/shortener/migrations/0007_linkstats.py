@@ -0,0 +1,55 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortener', '0006_alter_linkmapped_url_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkStats',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('day', models.DateField(verbose_name='День')),
+                (
+                    'clicks',
+                    models.PositiveIntegerField(
+                        default=0, verbose_name='Переходы'
+                    ),
+                ),
+                (
+                    'link',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='stats',
+                        to='shortener.linkmapped',
+                        verbose_name='Ссылка',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Статистика переходов',
+                'verbose_name_plural': 'Статистика переходов',
+                'ordering': ('-day',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='linkstats',
+            constraint=models.UniqueConstraint(
+                fields=('link', 'day'), name='unique link day stats'
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0006_feedrecipe'),
+        ('shortener', '0007_linkstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='linkmapped',
+            name='created_at',
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                verbose_name='Создано',
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='linkmapped',
+            name='last_accessed',
+            field=models.DateField(
+                blank=True,
+                db_index=True,
+                null=True,
+                verbose_name='Последний переход',
+            ),
+        ),
+        migrations.AddField(
+            model_name='linkmapped',
+            name='recipe',
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='short_link',
+                to='recipes.recipe',
+                verbose_name='Рецепт',
+            ),
+        ),
+    ]
@@ -1,9 +1,16 @@
+import hashlib
 import string
 from random import choice, randint
+from urllib.parse import urlsplit, urlunsplit
 
-from django.db import models
+from django.db import connection, models, transaction
 
-from core.constants import MAX_HASH, MAX_HASH_LEN, MIN_HASH, URL_LEN
+from core.constants import (
+    MAX_HASH, MAX_HASH_LEN, MIN_HASH, RECIPE_URL, URL_LEN,
+)
+
+HASH_CHARS = string.digits + string.ascii_letters
+DEFAULT_PORTS = {'http': 80, 'https': 443}
 
 
 def gen_hash() -> str:
@@ -15,6 +22,28 @@ def gen_hash() -> str:
     )
 
 
+def canonical_url(url: str) -> str:
+    """Url without query, fragment, default port and host case."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.hostname or ''
+    if ':' in netloc:
+        netloc = f'[{netloc}]'
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f'{netloc}:{parts.port}'
+    return urlunsplit((scheme, netloc, parts.path or '/', '', ''))
+
+
+def url_hash_chars(url: str) -> str:
+    """sha256 of the url in base62; short links use its prefix."""
+    number = int.from_bytes(hashlib.sha256(url.encode()).digest(), 'big')
+    chars = []
+    while number:
+        number, index = divmod(number, len(HASH_CHARS))
+        chars.append(HASH_CHARS[index])
+    return ''.join(chars)
+
+
 class LinkMapped(models.Model):
     """Short links model."""
 
@@ -24,6 +53,21 @@ class LinkMapped(models.Model):
         unique=True
     )
     original_url = models.CharField(max_length=URL_LEN)
+    recipe = models.OneToOneField(
+        'recipes.Recipe',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='short_link',
+        verbose_name='Рецепт',
+    )
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    last_accessed = models.DateField(
+        'Последний переход',
+        null=True,
+        blank=True,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Ссылка'
@@ -31,3 +75,91 @@ class LinkMapped(models.Model):
 
     def __str__(self):
         return f'{self.original_url} -> {self.url_hash}'
+
+    @classmethod
+    def get_or_create_for_url(cls, url, **defaults):
+        """
+        Short link of the canonical url.
+
+        The hash is a prefix of the url digest, so the lookup goes through
+        the unique `url_hash` index. A prefix taken by another url is
+        extended by one char until it is free.
+        """
+        original_url = canonical_url(url)
+        chars = url_hash_chars(original_url)
+        for length in range(MIN_HASH, MAX_HASH_LEN + 1):
+            link, _ = cls.objects.get_or_create(
+                url_hash=chars[:length],
+                defaults={'original_url': original_url, **defaults},
+            )
+            if link.original_url == original_url:
+                return link
+        return cls.objects.create(original_url=original_url, **defaults)
+
+    @classmethod
+    def get_or_create_for_recipe(cls, recipe_id):
+        """Canonical recipe short link."""
+        return cls.get_or_create_for_url(
+            RECIPE_URL.format(recipe_id), recipe_id=recipe_id
+        )
+
+
+class LinkStats(models.Model):
+    """Short link clicks per day."""
+
+    link = models.ForeignKey(
+        LinkMapped,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name='Ссылка',
+    )
+    day = models.DateField('День')
+    clicks = models.PositiveIntegerField('Переходы', default=0)
+
+    class Meta:
+        ordering = ('-day',)
+        verbose_name = 'Статистика переходов'
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(
+                fields=['link', 'day'],
+                name='unique link day stats'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.link_id} {self.day}: {self.clicks}'
+
+    @classmethod
+    def add_clicks(cls, counts):
+        """
+        Upsert click counters in one batch.
+
+        :param counts: {(link_id, day): clicks}
+        """
+        table = connection.ops.quote_name(cls._meta.db_table)
+        links_table = connection.ops.quote_name(LinkMapped._meta.db_table)
+        # Ссылка могла быть удалена до сброса счетчиков.
+        sql = (
+            f'INSERT INTO {table} (link_id, day, clicks) '
+            f'SELECT id, %s, %s FROM {links_table} WHERE id = %s '
+            f'ON CONFLICT (link_id, day) '
+            f'DO UPDATE SET clicks = {table}.clicks + EXCLUDED.clicks'
+        )
+        last_accessed = {}
+        for link_id, day in counts:
+            last_accessed.setdefault(day, []).append(link_id)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                sql,
+                [
+                    (day, clicks, link_id)
+                    for (link_id, day), clicks in counts.items()
+                ],
+            )
+            for day, link_ids in last_accessed.items():
+                LinkMapped.objects.filter(
+                    models.Q(last_accessed__lt=day)
+                    | models.Q(last_accessed__isnull=True),
+                    id__in=link_ids,
+                ).update(last_accessed=day)
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db.models import Q
+
+from core.cache import LRUCache, get_shared_cache
+from core.constants import MAX_HASH_LEN
+from core.metrics import cache_lookup
+from recipes.models import Recipe
+from .models import LinkMapped
+
+# Negative cache marker for unknown hashes.
+MISSING = ()
+
+local_cache = LRUCache(
+    settings.SHORT_LINK_CACHE_SIZE, settings.SHORT_LINK_LOCAL_TIMEOUT
+)
+
+
+def cache_key(url_hash):
+    return f'shortener:link:{url_hash}'
+
+
+def get_link(url_hash):
+    """
+    Short link hash -> (link id, original url) or None.
+
+    Looked up in the worker LRU, then in the shared cache, then in the
+    database. Unknown hashes and links to hidden recipes are cached as
+    missing, for a shorter time.
+    """
+    if len(url_hash) > MAX_HASH_LEN or not url_hash.isalnum():
+        return None
+
+    link = local_cache.get(url_hash)
+    if link is not None:
+        cache_lookup('short_link', 'local')
+    else:
+        shared_cache = get_shared_cache()
+        if shared_cache is not None:
+            link = shared_cache.get(cache_key(url_hash))
+        cache_lookup('short_link', 'miss' if link is None else 'shared')
+        if link is None:
+            link = LinkMapped.objects.filter(
+                Q(recipe__isnull=True)
+                | Q(recipe__in=Recipe.objects.visible()),
+                url_hash=url_hash,
+            ).values_list('id', 'original_url').first() or MISSING
+            if shared_cache is not None:
+                shared_cache.set(
+                    cache_key(url_hash),
+                    link,
+                    _timeout(link, settings.SHORT_LINK_CACHE_TIMEOUT)
+                )
+        local_cache.set(
+            url_hash,
+            link,
+            _timeout(link, settings.SHORT_LINK_LOCAL_TIMEOUT)
+        )
+
+    return link or None
+
+
+def invalidate(*url_hashes):
+    for url_hash in url_hashes:
+        local_cache.delete(url_hash)
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete_many(
+            [cache_key(url_hash) for url_hash in url_hashes]
+        )
+
+
+def _timeout(link, timeout):
+    if link == MISSING:
+        return min(timeout, settings.SHORT_LINK_MISS_TIMEOUT)
+    return timeout
@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Recipe
+from users.models import User
+from . import resolver
+from .models import LinkMapped
+
+
+@receiver(post_save, sender=LinkMapped)
+@receiver(post_delete, sender=LinkMapped)
+def invalidate_link(sender, instance, **kwargs):
+    url_hash = instance.url_hash
+    transaction.on_commit(lambda: resolver.invalidate(url_hash))
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_link(sender, instance, created, **kwargs):
+    if created:
+        LinkMapped.get_or_create_for_recipe(instance.id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def invalidate_hidden_links(
+    sender, instance, created, update_fields, **kwargs
+):
+    """Cached redirects to recipes hidden by `schedule_deletion`."""
+    if update_fields is None:
+        # Полное сохранение (админка, shell) могло скрыть объект.
+        if created or not instance.is_hidden:
+            return
+    elif 'is_hidden' not in update_fields:
+        return
+    if sender is Recipe:
+        links = LinkMapped.objects.filter(recipe_id=instance.id)
+    else:
+        links = LinkMapped.objects.filter(recipe__author_id=instance.id)
+    url_hashes = list(links.values_list('url_hash', flat=True))
+    transaction.on_commit(lambda: resolver.invalidate(*url_hashes))
@@ -1,15 +1,16 @@
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.views.decorators.http import require_GET
 
-from .models import LinkMapped
+from .analytics import clicks
+from .resolver import get_link
 
 
 @require_GET
 def load_url(request, url_hash: str) -> HttpResponse:
     """Short -> original"""
-    original_url = get_object_or_404(
-        LinkMapped,
-        url_hash=url_hash
-    ).original_url
-    return redirect(original_url)
+    link = get_link(url_hash)
+    if link is None:
+        raise Http404('Ссылка не найдена.')
+    link_id, original_url = link
+    clicks.record(link_id)
+    return HttpResponseRedirect(original_url)
@@ -3,6 +3,7 @@ from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group
 from rest_framework.authtoken.models import TokenProxy
 
+from core.deletion import schedule_deletion
 from .models import Subscriber, User
 
 
@@ -22,6 +23,7 @@ class UsersAdmin(UserAdmin):
         'email'
     )
     search_help_text = 'Поиск по `username` и `email`'
+    list_filter = UserAdmin.list_filter + ('is_hidden',)
     list_display_links = (
         'id',
         'username',
@@ -34,7 +36,19 @@ class UsersAdmin(UserAdmin):
         """Get full name."""
         return obj.get_full_name()
 
+    def delete_model(self, request, obj):
+        schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            schedule_deletion(obj)
+
+
+@admin.register(Subscriber)
+class SubscriberAdmin(admin.ModelAdmin):
+    """Subscriptions admin site."""
+
+    list_select_related = ('user', 'author')
 
-admin.site.register(Subscriber)
 
 admin.site.unregister([Group, TokenProxy])
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0007_alter_user_first_name_alter_user_last_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='is_hidden',
+            field=models.BooleanField(
+                default=False,
+                help_text='Пользователь ожидает удаления',
+                verbose_name='Скрыт',
+            ),
+        ),
+    ]
@@ -1,13 +1,16 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from django_cleanup.cleanup import cleanup_select
 
 from core import abstract_models
+from core.cache import get_shared_cache
+from core.files import track_files
+from core.metrics import cache_lookup
 from users.constants import NAMES_MAX
 
 
-@cleanup_select
+@track_files
 class User(AbstractUser):
     """User model."""
 
@@ -20,6 +23,11 @@ class User(AbstractUser):
         blank=True,
         null=True
     )
+    is_hidden = models.BooleanField(
+        'Скрыт',
+        default=False,
+        help_text='Пользователь ожидает удаления',
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = [
@@ -60,16 +68,48 @@ class Subscriber(abstract_models.AuthorModel):
         return f'{self.user.username!r} подписан на {self.author.username!r}'
 
     @classmethod
-    def get_prefetch_subscribers(cls, lookup, user):
-        return models.Prefetch(
-            lookup,
-            queryset=cls.objects.all().annotate(
-                is_subscribed=models.Exists(
-                    cls.objects.filter(
-                        author=models.OuterRef('author'),
-                        user_id=user.id,
-                    )
-                )
-            ),
-            to_attr='subs',
+    def following_cache_key(cls, user_id):
+        return f'users:following:{user_id}'
+
+    @classmethod
+    def get_following_ids(cls, user):
+        """
+        Author ids followed by the user.
+
+        Loaded once per request (memoized on the user instance) and kept
+        in the shared cache between requests when one is configured.
+        """
+        if not user.is_authenticated:
+            return frozenset()
+
+        following_ids = getattr(user, '_following_ids', None)
+        if following_ids is not None:
+            return following_ids
+
+        cache = get_shared_cache()
+        key = cls.following_cache_key(user.id)
+        if cache is not None:
+            following_ids = cache.get(key)
+        cache_lookup(
+            'following', 'miss' if following_ids is None else 'shared'
         )
+        if following_ids is None:
+            following_ids = frozenset(
+                cls.objects.filter(user_id=user.id)
+                .values_list('author_id', flat=True)
+            )
+            if cache is not None:
+                cache.set(
+                    key, following_ids, settings.FOLLOWING_CACHE_TIMEOUT
+                )
+
+        user._following_ids = following_ids
+        return following_ids
+
+    @classmethod
+    def invalidate_following(cls, *user_ids):
+        cache = get_shared_cache()
+        if cache is not None:
+            cache.delete_many(
+                [cls.following_cache_key(user_id) for user_id in user_ids]
+            )
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import tokens
+from .models import Subscriber, User
+
+
+@receiver(post_save, sender=Subscriber)
+@receiver(post_delete, sender=Subscriber)
+def invalidate_following(sender, instance, **kwargs):
+    """Drop cached followed authors after subscribe/unsubscribe."""
+    if Subscriber.user.is_cached(instance):
+        instance.user.__dict__.pop('_following_ids', None)
+    user_id = instance.user_id
+    transaction.on_commit(
+        lambda: Subscriber.invalidate_following(user_id)
+    )
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """Logout."""
+    key = instance.key
+    tokens.invalidate(key)
+    transaction.on_commit(lambda: tokens.invalidate(key))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Password, activity or profile changes."""
+    if created:
+        return
+    user_id = instance.id
+    transaction.on_commit(lambda: tokens.invalidate_user(user_id))
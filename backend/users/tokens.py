@@ -0,0 +1,84 @@
+"""
+Token -> user snapshots for `api.authentication.CachedTokenAuthentication`.
+
+Snapshots live in a worker LRU with a short lifetime and, when one is
+configured, in the shared cache. They are dropped when the token is
+deleted (logout) and whenever the user row is saved (password change,
+deactivation, profile and avatar edits).
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+from core.cache import LRUCache, get_shared_cache
+from core.metrics import cache_lookup
+
+User = get_user_model()
+
+# Хеш пароля не нужен для аутентификации по токену и не копируется в
+# общий кэш, у экземпляра пользователя поле отложено.
+FIELD_NAMES = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname != 'password'
+)
+# Снимки старой схемы пользователя не читаются после миграций.
+SNAPSHOT_VERSION = hashlib.md5(','.join(FIELD_NAMES).encode()).hexdigest()[:8]
+
+local_cache = LRUCache(
+    settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_LOCAL_TIMEOUT
+)
+
+
+def cache_key(key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'users:token:{SNAPSHOT_VERSION}:{digest}'
+
+
+def get_token_user(key):
+    """
+    Token key -> (user, token).
+
+    :raises Token.DoesNotExist:
+    """
+    snapshot = local_cache.get(key)
+    if snapshot is not None:
+        cache_lookup('token', 'local')
+    else:
+        shared_cache = get_shared_cache()
+        if shared_cache is not None:
+            snapshot = shared_cache.get(cache_key(key))
+        cache_lookup('token', 'miss' if snapshot is None else 'shared')
+        if snapshot is None:
+            token = Token.objects.select_related('user').defer(
+                'user__password'
+            ).get(key=key)
+            snapshot = tuple(
+                getattr(token.user, name) for name in FIELD_NAMES
+            )
+            if shared_cache is not None:
+                shared_cache.set(
+                    cache_key(key), snapshot, settings.TOKEN_CACHE_TIMEOUT
+                )
+        local_cache.set(key, snapshot)
+
+    # Каждый запрос получает собственный экземпляр пользователя.
+    user = User.from_db('default', FIELD_NAMES, snapshot)
+    token = Token(key=key, user=user)
+    token._state.adding = False
+    return user, token
+
+
+def invalidate(*keys):
+    shared_cache = get_shared_cache()
+    for key in keys:
+        local_cache.delete(key)
+        if shared_cache is not None:
+            shared_cache.delete(cache_key(key))
+
+
+def invalidate_user(user_id):
+    invalidate(
+        *Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    )